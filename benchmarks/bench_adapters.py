@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+    bench_adapters.py
+    ~~~~~~~~~~~~~~~~~
+
+    Micro-benchmark of per-point adapter overhead compared
+    to a bare tuple. Run from repository root::
+
+        python -m benchmarks.bench_adapters
+"""
+
+
+import timeit
+from iterscheme import IterationScheme, IterationSchemeElement, Constants, \
+                       named_parameter, dict_adapter, namedtuple_adapter, \
+                       slots_adapter, row_adapter
+
+
+def adapter_timings(repeat=5):
+    """Best time of a single adapter call in nanoseconds
+    for every adapter.
+    """
+    ischeme = IterationScheme(
+        Constants(named_parameter('c', 0.5)) >>
+        IterationSchemeElement(named_parameter('x', list(range(100)))) >>
+        IterationSchemeElement(named_parameter('y', [float(i) for i in range(100)]),
+                               named_parameter('z', list(range(100)))))
+    values = (0.5, 1, 2.0, 3)
+    calls = 100000
+
+    def bare(values):
+        return values
+
+    adapters = [('tuple', bare)]
+    for name, adapt in [('dict', dict_adapter), ('namedtuple', namedtuple_adapter),
+                        ('slots', slots_adapter), ('row', row_adapter)]:
+        adapters.append((name, adapt.compile(ischeme)))
+
+    timings = {}
+    for name, adapt in adapters:
+        best = min(timeit.repeat(lambda: adapt(values),  # pylint: disable=cell-var-from-loop
+                                 number=calls, repeat=repeat))
+        timings[name] = best / calls * 1e9
+
+    return timings
+
+
+def main(repeat=5):
+    for name, ns in adapter_timings(repeat).items():
+        print('{:<12} {:8.1f} ns/point'.format(name, ns))
+
+
+if __name__ == '__main__':
+    main()
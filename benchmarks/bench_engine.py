@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+    bench_engine.py
+    ~~~~~~~~~~~~~~~
+
+    Comparison of generated nested loops with flattening of
+    :func:`itertools.product` output. Run from repository root::
+
+        python -m benchmarks.bench_engine
+"""
+
+
+import timeit
+from collections import deque
+from itertools import product
+from iterscheme.iterscheme import _flatten
+from .suite import _scheme
+
+
+def main(repeat=5):
+    for sizes, width in [([1000, 1000], 1), ([100, 100, 100], 1),
+                         ([10] * 6, 1), ([1000, 1000], 4)]:
+        ischeme = _scheme(sizes, width)
+        components = ischeme.compile().components
+        points = len(ischeme)
+
+        def flattened():
+            deque(map(_flatten, product(*components)), maxlen=0)  # pylint: disable=cell-var-from-loop
+
+        def generated():
+            deque(iter(ischeme), maxlen=0)  # pylint: disable=cell-var-from-loop
+
+        times = [min(timeit.repeat(run, number=1, repeat=repeat)) / points * 1e9
+                 for run in (flattened, generated)]
+        print('sizes={} width={:<3} product {:7.1f} ns/point  generated {:7.1f} ns/point'
+              '  x{:.1f}'.format(sizes, width, times[0], times[1], times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
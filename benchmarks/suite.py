@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+    suite.py
+    ~~~~~~~~
+
+    Benchmark suite of per-point overhead and peak memory of iteration
+    schemes. Huge schemes are measured on sampled windows of flat
+    indices, so 10^8 points take as long as 10^5. Run from repository
+    root::
+
+        python -m benchmarks.suite --save baseline.json
+        python -m benchmarks.suite --compare baseline.json --threshold 0.15
+
+    Comparison exits with status 1 when any case got slower (or used
+    more memory) than baseline by more than the threshold.
+"""
+
+
+import argparse
+import json
+import platform
+import re
+import sys
+import timeit
+import tracemalloc
+from collections import deque
+import numpy
+from iterscheme import IterationScheme, IterationSchemeElement, NoConstants, \
+                       Constants, named_parameter, dict_adapter, namedtuple_adapter
+from .bench_adapters import adapter_timings
+
+ISE = IterationSchemeElement
+
+SAMPLE_POINTS = 100000
+WINDOWS = 10
+
+
+def _scheme(sizes, width=1, numpy_values=False):
+    """Scheme with a level for every size, the innermost level zips
+    :arg:`width` variables.
+    """
+    def values(name, size):
+        if numpy_values:
+            return named_parameter(name, numpy.arange(size, dtype=float))
+        return named_parameter(name, [float(i) for i in range(size)])
+
+    element = Constants(named_parameter('c', 0.5))
+    for level, size in enumerate(sizes):
+        count = width if level == len(sizes) - 1 else 1
+        element = element >> ISE(*[values('v{}_{}'.format(level, i), size)
+                                   for i in range(count)])
+    return IterationScheme(element.nested_variables)
+
+
+def _windows(ischeme, sample):
+    """Flat index ranges which cover up to :arg:`sample` points
+    spread over the whole scheme.
+    """
+    length = len(ischeme)
+    if length <= sample:
+        return [(0, length)]
+    width = sample // WINDOWS
+    return [(i * (length - width) // (WINDOWS - 1),
+             i * (length - width) // (WINDOWS - 1) + width) for i in range(WINDOWS)]
+
+
+def _iteration(sizes, width=1, numpy_values=False, adapter=None):
+    def setup(sample):
+        ischeme = _scheme(sizes, width, numpy_values)
+        plan = ischeme.compile()
+        windows = _windows(ischeme, sample)
+        adapt = adapter.compile(ischeme) if adapter is not None else None
+
+        def run():
+            for start, stop in windows:
+                points = plan.iter_range(start, stop)
+                if adapt is not None:
+                    points = map(adapt, points)
+                deque(points, maxlen=0)
+
+        return run, sum(stop - start for start, stop in windows)
+    return setup
+
+
+def _split(sizes, parts):
+    def setup(_):
+        outer = named_parameter('x', list(range(sizes[0])))
+        inner = named_parameter('y', list(range(sizes[1])))
+
+        def run():
+            element = Constants(named_parameter('c', 0.5)) >> \
+                ISE(outer).split(parts) >> ISE(inner)
+            for nested_variables in element.nested_variables:
+                deque(IterationScheme(nested_variables), maxlen=0)
+
+        return run, sizes[0] * sizes[1]
+    return setup
+
+
+def _sizes(exponent, depth):
+    """Level sizes of a scheme with about 10^exponent points."""
+    base = exponent // depth
+    sizes = [10**base] * depth
+    sizes[-1] *= 10**(exponent - base * depth)
+    return sizes
+
+
+def cases():
+    """Dict of benchmark name to setup function, setup takes number of
+    sampled points and returns (run, points) pair.
+    """
+    found = {}
+    for exponent in range(3, 9):
+        found['iterate/1e{}'.format(exponent)] = _iteration(_sizes(exponent, 2))
+    for depth in (1, 2, 3, 6):
+        found['depth/{}'.format(depth)] = _iteration(_sizes(6, depth))
+    for width in (1, 4, 16):
+        found['zipped/{}'.format(width)] = _iteration([1000, 1000], width=width)
+    for name, adapter in [('tuple', None), ('dict', dict_adapter),
+                          ('namedtuple', namedtuple_adapter)]:
+        found['adapter/{}'.format(name)] = _iteration([100, 100, 100], adapter=adapter)
+    for exponent in (3, 6, 8):
+        found['numpy/1e{}'.format(exponent)] = _iteration(_sizes(exponent, 2),
+                                                          numpy_values=True)
+    for parts in (2, 4, 16):
+        found['split/{}'.format(parts)] = _split([1024, 1000], parts)
+
+    return found
+
+
+def measure(setup, repeat=5, sample=SAMPLE_POINTS):
+    """Best time per point in nanoseconds and peak traced memory of
+    setup and one run in bytes.
+    """
+    run, points = setup(sample)
+    seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+
+    tracemalloc.start()
+    try:
+        run, _ = setup(sample)
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'points': points, 'ns_per_point': seconds / points * 1e9,
+            'peak_bytes': peak}
+
+
+def run_suite(pattern='', repeat=5, sample=SAMPLE_POINTS):
+    """Runs cases with names matching :arg:`pattern` and returns
+    results in baseline format.
+    """
+    results = {}
+    for name, setup in cases().items():
+        if re.search(pattern, name):
+            results[name] = measure(setup, repeat, sample)
+    for name, ns in adapter_timings(repeat).items():
+        if re.search(pattern, 'adapter-call/' + name):
+            results['adapter-call/' + name] = {'points': 1, 'ns_per_point': ns,
+                                               'peak_bytes': 0}
+
+    return {'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'machine': platform.machine(),
+            'results': results}
+
+
+def compare(baseline, current, threshold):
+    """List of (name, metric, old, new) which got worse by more than
+    :arg:`threshold` (relative).
+    """
+    regressions = []
+    for name, new in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        for metric in ('ns_per_point', 'peak_bytes'):
+            if old[metric] and new[metric] > old[metric] * (1 + threshold):
+                regressions.append((name, metric, old[metric], new[metric]))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--filter', default='', help="regex of case names")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sample', type=int, default=SAMPLE_POINTS,
+                        help="points measured per case")
+    parser.add_argument('--save', help="write results to baseline file")
+    parser.add_argument('--compare', help="baseline file to compare with")
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.filter, args.repeat, args.sample)
+    for name, result in current['results'].items():
+        print('{:<20} {:10.1f} ns/point {:12d} bytes peak'.format(
+            name, result['ns_per_point'], result['peak_bytes']))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf8') as output:
+            json.dump(current, output, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf8') as baseline:
+            regressions = compare(json.load(baseline), current, args.threshold)
+        for name, metric, old, new in regressions:
+            print('REGRESSION {} {}: {:.1f} -> {:.1f} ({:+.0%})'.format(
+                name, metric, old, new, new / old - 1))
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,23 @@
 # -*- coding: utf-8 -*-
 
 from .iterscheme import IterationSchemeElement, IterationScheme, \
-                        NoConstants, Constants
+                        IterationPlan, Shard, NoConstants, Constants
 
-from .named_parameter import named_parameter, dict_adapter, namedtuple_adapter
+from .named_parameter import named_parameter, dict_adapter, namedtuple_adapter, \
+                             slots_adapter, row_adapter
+
+from .sources import Arithmetic, Geometric, OnDemand, Stream
+
+from .journal import Journal
+from .scheduling import CostScheduler
+from .coordinator import DirectoryCoordinator, DirectoryWorker
+from .sink import ColumnSink, ColumnReader
+from .grid import ResultGrid
+from .monitor import Monitor
+from .extension import Extension
+from .staged import Staged
+from .shared import SharedScheme
+from .adaptive import AdaptiveMap, StopAxis, SkipSubtree
+from .cache import ResultCache
 
 __version__ = "0.2"
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+    adaptive.py
+    ~~~~~~~~~~~
+
+    Evaluation which skips parts of the scheme on request of
+    the evaluated function.
+"""
+
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from . import parallel
+
+
+class StopAxis():
+    """Result of evaluated function which stops level :arg:`axis`
+    (parameter name or element index, constants are element 0) for
+    the current values of outer levels: all remaining points with
+    larger positions on the axis are skipped. :arg:`result` is kept as
+    result of the current point::
+
+        def solve(point):
+            energy = ...
+            if diverged(energy):
+                return StopAxis('field', energy)
+            return energy
+    """
+    __slots__ = ('axis', 'result')
+    _inclusive = False
+
+    def __init__(self, axis, result=None):
+        self.axis = axis
+        self.result = result
+
+    def __repr__(self):
+        return '{}({!r}, {!r})'.format(type(self).__name__, self.axis, self.result)
+
+
+class SkipSubtree(StopAxis):
+    """Like :class:`iterscheme.StopAxis`, but skips only remaining
+    points of levels inside :arg:`axis` for the current value of
+    the axis, evaluation continues with the next value of the axis.
+    """
+    __slots__ = ()
+    _inclusive = True
+
+
+def _axis_levels(ischeme):
+    """Maps parameter names and element indices to plan levels.
+    """
+    levels = {}
+    for level, names in enumerate(ischeme.level_names()):
+        for name in names:
+            levels[name] = level
+    shift = 0 if ischeme.has_constants else 1
+    for level in range(len(ischeme.compile().levels)):
+        levels[level + shift] = level
+
+    return levels
+
+
+def _evaluate_adaptive(start, stop, worker=None):
+    """Evaluates range of points until the end or feedback. Returns
+    (start, [(index, result)...], [(skip_start, skip_stop, index)...]),
+    skipped ranges can go past :arg:`stop`. Uses :arg:`worker` state
+    (serial runs) or the state of pool worker process.
+    """
+    ischeme, func, adapt = worker or parallel._WORKER  # pylint: disable=protected-access
+    plan = ischeme.compile()
+    levels = _axis_levels(ischeme)
+    results, skipped = [], []
+    index = start
+    while index < stop:
+        for values in plan.iter_range(index, stop):
+            result = func(adapt(values) if adapt is not None else values)
+            if not isinstance(result, StopAxis):
+                results.append((index, result))
+                index += 1
+                continue
+
+            if result.axis not in levels:
+                raise ValueError("no axis {!r} in the scheme".format(result.axis))
+            level = levels[result.axis]
+            end = plan.subtree_end(index, level if result._inclusive else level - 1)  # pylint: disable=protected-access
+            results.append((index, result.result))
+            if end > index + 1:
+                skipped.append((index + 1, end, index))
+            index = end
+            break
+        else:
+            break
+
+    return start, results, skipped
+
+
+def _subtract(start, stop, skipped):
+    """Parts of [start, stop) which are not covered by sorted
+    disjoint :arg:`skipped` ranges.
+    """
+    for skip_start, skip_stop in skipped:
+        if skip_stop <= start:
+            continue
+        if skip_start >= stop:
+            break
+        if skip_start > start:
+            yield start, skip_start
+        start = max(start, skip_stop)
+    if start < stop:
+        yield start, stop
+
+
+class AdaptiveMap():
+    """Result of :meth:`iterscheme.IterationScheme.adaptive_map`,
+    iterable over results like :meth:`iterscheme.IterationScheme.map`.
+
+    Function can return :class:`iterscheme.StopAxis` or
+    :class:`iterscheme.SkipSubtree` to skip points which depend on its
+    result. Skipped points are recorded in :attr:`skipped` as sorted
+    list of (start, stop, index) ranges of flat indices together with
+    the index of the point which requested skipping, so there is no
+    result only for these points.
+
+    In serial mode (``workers=1``) skipping is exact. On a process pool
+    it is exact within a chunk, chunks which are already submitted are
+    evaluated anyway and their results are yielded (their points are
+    left out of recorded ranges), next chunks are cut by ranges skipped
+    so far.
+    """
+    def __init__(self, ischeme, func, workers=None, chunksize=None,
+                 ordered=True, adapter=None, with_index=False):
+        self.skipped = []
+        self._submitted = {}
+        self._results = self._run(ischeme, func, workers or os.cpu_count() or 1,
+                                  chunksize, ordered, adapter, with_index)
+
+    def __iter__(self):
+        return self._results
+
+    def close(self):
+        """Stops evaluation and cancels chunks which are not started.
+        """
+        self._results.close()
+
+    def skipped_count(self):
+        """Number of skipped points.
+        """
+        return sum(stop - start for start, stop in self._merged())
+
+    def _merged(self):
+        merged = []
+        for start, stop, _ in self.skipped:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+            else:
+                merged.append((start, stop))
+        return merged
+
+    def _record(self, start, skipped):
+        """Records ranges skipped by chunk :arg:`start` without points
+        of other submitted chunks, which are evaluated anyway.
+        """
+        if not skipped:
+            return
+        others = [(chunk_start, chunk_stop)
+                  for chunk_start, chunk_stop in self._submitted.items()
+                  if chunk_start != start]
+        for skip_start, skip_stop, index in skipped:
+            self.skipped.extend((low, high, index)
+                                for low, high in _subtract(skip_start, skip_stop, others))
+        self.skipped.sort()
+
+    def _chunks(self, length, chunksize):
+        for chunk_start in range(0, length, chunksize):
+            chunk_stop = min(chunk_start + chunksize, length)
+            for start, stop in _subtract(chunk_start, chunk_stop, self._merged()):
+                self._submitted[start] = stop
+                yield start, stop
+
+    def _run(self, ischeme, func, workers, chunksize, ordered, adapter, with_index):
+        length = len(ischeme)
+        if chunksize is None:
+            chunksize = max(1, -(-length // (workers * 4)))
+
+        if workers == 1:
+            worker = parallel._worker_state(ischeme, func, adapter)  # pylint: disable=protected-access
+            for start, stop in self._chunks(length, chunksize):
+                _, results, skipped = _evaluate_adaptive(start, stop, worker)
+                self._record(start, skipped)
+                yield from self._unpack(results, with_index)
+            return
+
+        with ProcessPoolExecutor(workers, initializer=parallel._init_worker,  # pylint: disable=protected-access
+                                 initargs=(ischeme, func, adapter)) as pool:
+            pending = deque()
+            try:
+                for start, stop in self._chunks(length, chunksize):
+                    pending.append(pool.submit(_evaluate_adaptive, start, stop))
+                    if len(pending) >= workers * 2:
+                        yield from self._completed(pending, ordered, with_index)
+
+                while pending:
+                    yield from self._completed(pending, ordered, with_index)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _completed(self, pending, ordered, with_index):
+        if ordered:
+            done = [pending.popleft()]
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+        for future in done:
+            start, results, skipped = future.result()
+            self._record(start, skipped)
+            yield from self._unpack(results, with_index)
+
+    @staticmethod
+    def _unpack(results, with_index):
+        if with_index:
+            yield from results
+        else:
+            for _, result in results:
+                yield result
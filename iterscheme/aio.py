@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+    aio.py
+    ~~~~~~
+
+    asyncio driver for iteration schemes with I/O-bound evaluation.
+"""
+
+
+import asyncio
+from collections import deque
+
+
+async def scheme_aiter(ischeme, adapter=None, yield_every=1024):
+    """Asynchronous iteration over points of :arg:`ischeme`. Control
+    goes back to event loop every :arg:`yield_every` points, so long
+    iteration doesn't starve other tasks.
+    """
+    points = iter(ischeme)
+    if adapter is not None:
+        points = map(adapter.compile(ischeme), points)
+
+    for count, point in enumerate(points, 1):
+        yield point
+        if count % yield_every == 0:
+            await asyncio.sleep(0)
+
+
+async def _amap(ischeme, coro_func, concurrency, ordered, adapter, with_index):
+    if concurrency < 1:
+        raise ValueError("concurrency must be positive")
+
+    points = iter(ischeme)
+    if adapter is not None:
+        points = map(adapter.compile(ischeme), points)
+
+    def output(index, result):
+        return (index, result) if with_index else result
+
+    # Tasks which are running or done but not yielded yet, at most
+    # concurrency of them, so points are taken only when there is room
+    tasks = deque()
+    indices = {}
+    try:
+        for index, point in enumerate(points):
+            task = asyncio.ensure_future(coro_func(point))
+            tasks.append(task)
+            indices[task] = index
+            if len(tasks) < concurrency:
+                continue
+
+            for task in await _finished(tasks, ordered):
+                yield output(indices.pop(task), task.result())
+
+        while tasks:
+            for task in await _finished(tasks, ordered):
+                yield output(indices.pop(task), task.result())
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _finished(tasks, ordered):
+    """Waits for the oldest task when order matters, otherwise for any,
+    and removes finished tasks from :arg:`tasks`.
+    """
+    if ordered:
+        await asyncio.wait([tasks[0]])
+        return [tasks.popleft()]
+
+    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in done:
+        tasks.remove(task)
+    return done
+
+
+class AsyncMap():
+    """Result of :meth:`iterscheme.IterationScheme.amap`. It is an
+    asynchronous iterable over results (``async for result in ...``),
+    awaiting it collects all results into list.
+    """
+    def __init__(self, ischeme, coro_func, concurrency, ordered=True,
+                 adapter=None, with_index=False):
+        self._results = _amap(ischeme, coro_func, concurrency, ordered,
+                              adapter, with_index)
+
+    def __aiter__(self):
+        return self._results
+
+    async def aclose(self):
+        """Cancels evaluations which are still running.
+        """
+        await self._results.aclose()
+
+    async def _collect(self):
+        return [result async for result in self._results]
+
+    def __await__(self):
+        return self._collect().__await__()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+    cache.py
+    ~~~~~~~~
+
+    Persistent cache of evaluation results keyed by parameter values.
+"""
+
+
+import hashlib
+import pickle
+import sqlite3
+import time
+import numpy
+
+
+def _stable_repr(value):
+    """Representation of value which doesn't depend on numpy
+    scalar/array types or on the numpy version.
+    """
+    if isinstance(value, numpy.generic):
+        return repr(value.item())
+    if isinstance(value, numpy.ndarray):
+        return repr((value.dtype.str, value.shape, value.tolist()))
+
+    return repr(value)
+
+
+class ResultCache():
+    """:class:`iterscheme.ResultCache` stores results of evaluation
+    of iteration scheme points in sqlite database :arg:`path`.
+
+    Result is keyed by a hash of the point's named values (see
+    :meth:`iterscheme.IterationScheme.column_names`) and :arg:`version`
+    tag of evaluated function, so bump the tag whenever function
+    changes. With :arg:`max_bytes` least recently used results are
+    evicted once stored results grow over the limit.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            cost REAL NOT NULL,
+            accessed INTEGER NOT NULL
+        )
+    """
+
+    def __init__(self, path, version='', max_bytes=None, commit_every=100):
+        self._version = str(version)
+        self._max_bytes = max_bytes
+        self._commit_every = commit_every
+        self._uncommitted = 0
+
+        self._db = sqlite3.connect(path)
+        self._db.execute(self._SCHEMA)
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed "
+                         "ON results (accessed)")
+        self._size, self._clock = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(accessed), 0) "
+            "FROM results").fetchone()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    def key(self, named_values):
+        """Hash of (name, value) pairs of a point and version tag.
+        """
+        digest = hashlib.sha256(self._version.encode())
+        for name, value in sorted(named_values, key=lambda item: item[0]):
+            digest.update(b'\0' + name.encode() + b'\0')
+            digest.update(_stable_repr(value).encode())
+
+        return digest.hexdigest()
+
+    def get(self, key, default=None):
+        """Returns cached result for :arg:`key` or :arg:`default`.
+        """
+        row = self._db.execute("SELECT value, cost FROM results "
+                               "WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self.saved_seconds += row[1]
+        self._clock += 1
+        self._db.execute("UPDATE results SET accessed = ? WHERE key = ?",
+                         (self._clock, key))
+        self._written()
+        return pickle.loads(row[0])
+
+    def put(self, key, result, cost=0.0):
+        """Stores :arg:`result` which took :arg:`cost` seconds
+        to compute.
+        """
+        value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        old = self._db.execute("SELECT size FROM results WHERE key = ?",
+                               (key,)).fetchone()
+        if old is not None:
+            self._size -= old[0]
+
+        self._clock += 1
+        self._db.execute("INSERT OR REPLACE INTO results "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (key, value, len(value), cost, self._clock))
+        self._size += len(value)
+        self._evict()
+        self._written()
+
+    def _evict(self):
+        if self._max_bytes is None:
+            return
+
+        while self._size > self._max_bytes:
+            row = self._db.execute("SELECT key, size FROM results "
+                                   "ORDER BY accessed LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (row[0],))
+            self._size -= row[1]
+            self.evictions += 1
+
+    def _written(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self._commit_every:
+            self.commit()
+
+    def commit(self):
+        """Makes all stored results durable.
+        """
+        self._db.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        """Commits and closes database.
+        """
+        self.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @property
+    def stats(self):
+        """Snapshot of cache statistics.
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'saved_seconds': self.saved_seconds,
+                'entries': len(self),
+                'bytes': self._size}
+
+    def evaluate(self, ischeme, func, adapter=None):
+        """Yields results of :arg:`func` for every point of
+        :arg:`ischeme` in scheme order, taking cached results when
+        available and storing new ones. :arg:`adapter` works like
+        in :meth:`iterscheme.IterationScheme.map`.
+        """
+        names = ischeme.column_names()
+        adapt = adapter.compile(ischeme) if adapter is not None else None
+        missing = object()
+
+        try:
+            for values in ischeme:
+                key = self.key(zip(names, values))
+                result = self.get(key, missing)
+                if result is missing:
+                    started = time.perf_counter()
+                    result = func(adapt(values) if adapt else values)
+                    self.put(key, result, time.perf_counter() - started)
+                yield result
+        finally:
+            self.commit()
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+    coordinator.py
+    ~~~~~~~~~~~~~~
+
+    Execution of one iteration scheme by several hosts which share
+    a directory (e.g. over NFS).
+"""
+
+
+import json
+import os
+import pickle
+import socket
+import threading
+import time
+import uuid
+from .iterscheme import IterationScheme
+
+
+def _write_atomic(path, data):
+    temporary = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+    with open(temporary, 'wb') as output:
+        output.write(data)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(temporary, path)
+
+
+class DirectoryCoordinator():
+    """:class:`iterscheme.DirectoryCoordinator` publishes
+    :arg:`ischeme` in directory :arg:`root` for
+    :class:`iterscheme.DirectoryWorker` processes on any host which
+    sees the directory. Scheme is stored as compact spec (see
+    :meth:`iterscheme.IterationScheme.to_spec`), flat index space is
+    cut into ranges of :arg:`chunksize` points.
+
+    Layout of the directory::
+
+        spec.json                   scheme spec and chunk size
+        leases/<start>-<stop>       lease of a range by a worker
+        results/<start>-<stop>      pickled list of results of a range
+
+    Worker creates lease file exclusively, refreshes its expiration
+    time while working and writes results before removing the lease.
+    Lease which isn't refreshed in time is taken over by other worker,
+    so ranges of dead hosts go back to the pool.
+    """
+    def __init__(self, root, ischeme, chunksize=1000):
+        self.root = root
+        self.ischeme = ischeme
+        self.chunksize = chunksize
+        for directory in ('leases', 'results'):
+            os.makedirs(os.path.join(root, directory), exist_ok=True)
+
+        spec = {'scheme': ischeme.to_spec(),
+                'fingerprint': ischeme.fingerprint(),
+                'length': len(ischeme),
+                'chunksize': chunksize}
+        spec_path = os.path.join(root, 'spec.json')
+        if os.path.exists(spec_path):
+            with open(spec_path, 'r', encoding='utf8') as existing:
+                existing = json.load(existing)
+            if (existing['fingerprint'], existing['chunksize']) != \
+                    (spec['fingerprint'], spec['chunksize']):
+                raise ValueError("{} holds another sweep".format(root))
+        else:
+            _write_atomic(spec_path, json.dumps(spec).encode())
+
+    def ranges(self):
+        """All [start, stop) ranges of the sweep.
+        """
+        return _ranges(len(self.ischeme), self.chunksize)
+
+    def progress(self):
+        """Number of committed ranges and total number of ranges.
+        """
+        committed = set(os.listdir(os.path.join(self.root, 'results')))
+        ranges = self.ranges()
+        done = sum(_range_name(*r) in committed for r in ranges)
+        return done, len(ranges)
+
+    @property
+    def complete(self):
+        """Whether results of all ranges are committed.
+        """
+        done, total = self.progress()
+        return done == total
+
+    def results(self, with_index=False):
+        """Yields committed results in scheme order. Ranges which
+        are not committed yet raise :exc:`KeyError`.
+        """
+        for start, stop in self.ranges():
+            path = os.path.join(self.root, 'results', _range_name(start, stop))
+            if not os.path.exists(path):
+                raise KeyError("range [{}, {}) is not committed".format(start, stop))
+            with open(path, 'rb') as committed:
+                results = pickle.load(committed)
+            if with_index:
+                yield from enumerate(results, start)
+            else:
+                yield from results
+
+
+def _ranges(length, chunksize):
+    return [(start, min(start + chunksize, length))
+            for start in range(0, length, chunksize)]
+
+
+def _range_name(start, stop):
+    return '{}-{}'.format(start, stop)
+
+
+class DirectoryWorker():
+    """:class:`iterscheme.DirectoryWorker` evaluates ranges of the sweep
+    published by :class:`iterscheme.DirectoryCoordinator` in :arg:`root`.
+    Lease is valid for :arg:`lease_seconds` and is refreshed by
+    a background thread three times per lease period.
+    """
+    def __init__(self, root, worker_id=None, lease_seconds=60.0):
+        self.root = root
+        self.worker_id = worker_id or '{}-{}-{}'.format(
+            socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+        self.lease_seconds = lease_seconds
+
+        with open(os.path.join(root, 'spec.json'), 'r', encoding='utf8') as spec:
+            spec = json.load(spec)
+        self.ischeme = IterationScheme.from_spec(spec['scheme'])
+        if self.ischeme.fingerprint() != spec['fingerprint']:
+            raise ValueError("scheme restored from spec differs from original")
+        self._ranges = _ranges(spec['length'], spec['chunksize'])
+
+    def _lease_path(self, start, stop):
+        return os.path.join(self.root, 'leases', _range_name(start, stop))
+
+    def _result_path(self, start, stop):
+        return os.path.join(self.root, 'results', _range_name(start, stop))
+
+    def _lease_content(self):
+        return json.dumps({'worker': self.worker_id,
+                           'expires': time.time() + self.lease_seconds}).encode()
+
+    def _read_lease(self, path):
+        try:
+            with open(path, 'r', encoding='utf8') as lease:
+                return json.load(lease)
+        except (FileNotFoundError, ValueError):
+            # Lease is being written or replaced right now
+            return None
+
+    def acquire(self):
+        """Leases the first range which is neither committed nor leased
+        by a live worker. Returns (start, stop) or None.
+        """
+        for start, stop in self._ranges:
+            if os.path.exists(self._result_path(start, stop)):
+                continue
+
+            path = self._lease_path(start, stop)
+            lease = self._read_lease(path)
+            if lease is not None and lease['expires'] < time.time():
+                if not self._take_over(path, lease):
+                    continue
+
+            try:
+                descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(descriptor, 'wb') as lease:
+                lease.write(self._lease_content())
+
+            if os.path.exists(self._result_path(start, stop)):
+                # Committed between the check and the lease
+                os.remove(path)
+                continue
+
+            return start, stop
+
+        return None
+
+    def _take_over(self, path, lease):
+        """Moves expired :arg:`lease` away, compare-and-swap like: other
+        worker may have replaced it with a live lease since it was read,
+        then the moved lease is put back and False is returned.
+        """
+        moved = '{}.expired.{}'.format(path, self.worker_id)
+        try:
+            os.rename(path, moved)
+        except FileNotFoundError:
+            return False
+
+        if self._read_lease(moved) == lease:
+            os.remove(moved)
+            return True
+
+        try:
+            os.link(moved, path)
+        except FileExistsError:
+            # Yet another lease took its place, the owner of the moved
+            # one finds out on its next heartbeat
+            pass
+        os.remove(moved)
+        return False
+
+    def heartbeat(self, start, stop):
+        """Extends lease of the range. Returns False when lease
+        was taken over by other worker.
+        """
+        path = self._lease_path(start, stop)
+        lease = self._read_lease(path)
+        if lease is None or lease['worker'] != self.worker_id:
+            return False
+
+        _write_atomic(path, self._lease_content())
+        return True
+
+    def commit(self, start, stop, results):
+        """Stores results of the range and releases its lease.
+        """
+        _write_atomic(self._result_path(start, stop),
+                      pickle.dumps(list(results), protocol=pickle.HIGHEST_PROTOCOL))
+        lease = self._read_lease(self._lease_path(start, stop))
+        if lease is not None and lease['worker'] == self.worker_id:
+            os.remove(self._lease_path(start, stop))
+
+    def run(self, func, adapter=None, wait=True, poll=1.0):
+        """Evaluates :arg:`func` over leased ranges until the sweep is
+        finished. With :arg:`wait` worker keeps polling while ranges
+        are leased by others, so it takes over ranges of dead workers.
+        Range whose lease was taken over by other worker (failed
+        heartbeat) is dropped without commit. Returns number of
+        committed ranges.
+        """
+        plan = self.ischeme.compile()
+        adapt = adapter.compile(self.ischeme) if adapter is not None else None
+        committed = 0
+        while True:
+            leased = self.acquire()
+            if leased is None:
+                if not wait or self._finished():
+                    return committed
+                time.sleep(poll)
+                continue
+
+            start, stop = leased
+            stop_heartbeat, lost = threading.Event(), threading.Event()
+            heartbeat = threading.Thread(target=self._keep_alive,
+                                         args=(start, stop, stop_heartbeat, lost),
+                                         daemon=True)
+            heartbeat.start()
+            try:
+                points = plan.iter_range(start, stop)
+                if adapt is not None:
+                    points = map(adapt, points)
+                results = []
+                for point in points:
+                    if lost.is_set():
+                        break
+                    results.append(func(point))
+            finally:
+                stop_heartbeat.set()
+                heartbeat.join()
+
+            if lost.is_set():
+                continue
+            self.commit(start, stop, results)
+            committed += 1
+
+    def _keep_alive(self, start, stop, stopped, lost):
+        while not stopped.wait(self.lease_seconds / 3):
+            if not self.heartbeat(start, stop):
+                lost.set()
+                return
+
+    def _finished(self):
+        return all(os.path.exists(self._result_path(*r)) for r in self._ranges)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+    extension.py
+    ~~~~~~~~~~~~
+
+    Points added to a sweep by growing its scheme.
+"""
+
+
+import numpy
+from .named_parameter import named_parameter
+from .iterscheme import _key
+
+
+def _level_keys(level, size):
+    return [_key(tuple(var[d] for var in level)) for d in range(size)]
+
+
+def _select(var, positions):
+    """Variable with values at :arg:`positions` only, name of named
+    parameter is kept. Contiguous positions give a slice (view of
+    numpy arrays, lazy slice of lazy sources).
+    """
+    if len(positions) == len(var):
+        return var
+    if positions[-1] - positions[0] + 1 == len(positions):
+        return var[positions[0]:positions[-1] + 1]
+    if isinstance(var, numpy.ndarray):
+        return var[numpy.asarray(positions)]
+
+    values = [var[p] for p in positions]
+    if hasattr(var, 'parameter_name'):
+        return named_parameter(var.parameter_name, values)
+    return values
+
+
+class Extension():
+    """:class:`iterscheme.Extension` describes points of :arg:`new`
+    scheme which are not in :arg:`old` one, e.g. after values were
+    appended to some levels. Levels are matched by names of
+    parameters (see :meth:`iterscheme.IterationScheme.level_names`),
+    so both schemes must have the same levels, values of a level are
+    matched by equality.
+
+    Added points are covered by disjoint sub-schemes (:attr:`schemes`)
+    without enumerating the old product: i-th of them takes old values
+    on levels above i, new values on level i and all values below.
+    Points are reported with their flat indices in :arg:`new`, so
+    results of the extension and, via :meth:`old_to_new`, results of
+    the old sweep go into the same storage (e.g.
+    :class:`iterscheme.ResultGrid` or a journal of the new scheme).
+
+    Constraints of :arg:`new` apply to the sub-schemes, :arg:`old` is
+    assumed to have the same constraints.
+    """
+    def __init__(self, old, new):
+        if old.level_names() != new.level_names():
+            raise ValueError("schemes have different levels: {} and {}".format(
+                old.level_names(), new.level_names()))
+        self.old = old
+        self.new = new
+        self._old_plan = old.compile()
+        self._new_plan = new.compile()
+        if None in self._old_plan.sizes or None in self._new_plan.sizes:
+            raise TypeError("scheme with stream can't be extended")
+
+        # Per level: new positions of old values (-1 for removed values),
+        # positions of kept and of added values in the new level
+        self._old_to_new = []
+        common, added = [], []
+        for old_level, old_size, new_level, new_size in zip(
+                self._old_plan.levels, self._old_plan.sizes,
+                self._new_plan.levels, self._new_plan.sizes):
+            new_positions = {}
+            for position, key in enumerate(_level_keys(new_level, new_size)):
+                new_positions.setdefault(key, position)
+            old_keys = _level_keys(old_level, old_size)
+            self._old_to_new.append(numpy.array(
+                [new_positions.get(key, -1) for key in old_keys], dtype=numpy.int64))
+            kept = set(old_keys)
+            keys = _level_keys(new_level, new_size)
+            common.append([p for p, key in enumerate(keys) if key in kept])
+            added.append([p for p, key in enumerate(keys) if key not in kept])
+
+        self._parts = []
+        for level, level_added in enumerate(added):
+            positions = common[:level] + [level_added] + \
+                [list(range(size)) for size in self._new_plan.sizes[level + 1:]]
+            if all(positions):
+                self._parts.append((self._part_scheme(positions),
+                                    [numpy.array(p, dtype=numpy.int64) for p in positions]))
+
+    def _part_scheme(self, positions):
+        nested_variables = self.new._nested_variables  # pylint: disable=protected-access
+        pruning = self._part_pruning(positions)
+        levels = list(self._new_plan.levels)
+        if self.new.has_constants:
+            parts = [nested_variables[0]]
+            levels, positions = levels[1:], positions[1:]
+        else:
+            parts = [[]]
+        for level, level_positions in zip(levels, positions):
+            parts.append(tuple(_select(var, level_positions) for var in level))
+
+        return type(self.new)(parts, pruning=pruning)
+
+    def _part_pruning(self, positions):
+        """Pruning of sub-scheme with :arg:`positions` of new scheme
+        levels: prefixes of the sub-scheme which are valid prefixes of
+        the new scheme.
+        """
+        plan = self._new_plan
+        if plan.prefixes is None:
+            return None
+
+        prefixes = numpy.zeros(1, dtype=numpy.int64)
+        for size, level_positions in zip(plan.sizes[:plan.depth + 1], positions):
+            prefixes = (prefixes[:, None] * size +
+                        numpy.asarray(level_positions, dtype=numpy.int64)).ravel()
+        return plan.depth, numpy.flatnonzero(numpy.isin(prefixes, plan.prefixes))
+
+    @property
+    def schemes(self):
+        """Disjoint sub-schemes which cover all added points.
+        """
+        return [scheme for scheme, _ in self._parts]
+
+    def __len__(self):
+        return sum(len(scheme) for scheme, _ in self._parts)
+
+    def new_indices(self, part, indices):
+        """Flat indices in the new scheme of points with flat
+        :arg:`indices` (int or numpy array) in :arg:`part`-th sub-scheme.
+        """
+        scheme, positions = self._parts[part]
+        plan = scheme.compile()
+        canonical = plan.canonical(indices)
+        new_canonical = 0
+        for stride, size, level_positions, new_stride in zip(
+                plan.strides, plan.sizes, positions, self._new_plan.strides):
+            new_canonical = new_canonical + \
+                level_positions[(canonical // stride) % size] * new_stride
+
+        return self._new_plan.logical(new_canonical)
+
+    def old_to_new(self, indices):
+        """Flat indices in the new scheme of points with flat
+        :arg:`indices` (numpy array) in the old scheme, -1 for points
+        which are not in the new scheme.
+        """
+        canonical = self._old_plan.canonical(numpy.asarray(indices, dtype=numpy.int64))
+        new_canonical = numpy.zeros(canonical.shape, dtype=numpy.int64)
+        missing = numpy.zeros(canonical.shape, dtype=bool)
+        for stride, size, mapping, new_stride in zip(
+                self._old_plan.strides, self._old_plan.sizes,
+                self._old_to_new, self._new_plan.strides):
+            positions = mapping[(canonical // stride) % size]
+            missing |= positions < 0
+            new_canonical += positions * new_stride
+
+        new = self._new_plan.logical(new_canonical)
+        return numpy.where(missing, -1, new)
+
+    def indices(self):
+        """Sorted array of flat indices in the new scheme of all
+        added points.
+        """
+        parts = [self.new_indices(part, numpy.arange(len(scheme), dtype=numpy.int64))
+                 for part, (scheme, _) in enumerate(self._parts)]
+        if not parts:
+            return numpy.empty(0, dtype=numpy.int64)
+        return numpy.sort(numpy.concatenate(parts))
+
+    def __iter__(self):
+        """Yields (new_index, point) pairs of added points.
+        """
+        chunk = 4096
+        for part, (scheme, _) in enumerate(self._parts):
+            plan = scheme.compile()
+            for start in range(0, len(scheme), chunk):
+                stop = min(start + chunk, len(scheme))
+                indices = self.new_indices(part, numpy.arange(start, stop, dtype=numpy.int64))
+                yield from zip(indices.tolist(), plan.iter_range(start, stop))
+
+    def map(self, func, **kwargs):
+        """Evaluates :arg:`func` over added points with
+        :meth:`iterscheme.IterationScheme.map` of every sub-scheme and
+        yields (new_index, result) pairs. Keyword arguments are passed
+        to :meth:`iterscheme.IterationScheme.map`.
+        """
+        for part, (scheme, _) in enumerate(self._parts):
+            for index, result in scheme.map(func, with_index=True, **kwargs):
+                yield int(self.new_indices(part, index)), result
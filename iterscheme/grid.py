@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+    grid.py
+    ~~~~~~~
+
+    N-dimensional result container shaped after scheme levels.
+"""
+
+
+import numpy
+from numpy.lib.format import open_memmap
+from .iterscheme import _column_source
+from .sources import LazySequence
+
+
+class ResultGrid():
+    """:class:`iterscheme.ResultGrid` is preallocated array of results
+    with an axis for every level of :arg:`ischeme` except constants.
+    Zipped variables (``ISE(a, b)``) share one axis, which can be
+    addressed by name of any of them. Coordinates of axis are values
+    of its variables.
+
+    Grid is filled in place by flat index of the scheme, so results of
+    serial, parallel or resumed runs can go in any order. Points
+    removed from scheme by constraints keep :arg:`fill_value` (NaN for
+    floating point dtypes by default). Every result has
+    :arg:`item_shape`.
+
+    With :arg:`path` grid is stored in ``.npy`` file opened as
+    :class:`numpy.memmap`, so it can be bigger than RAM and can be
+    opened again by :meth:`open`, e.g. from worker processes.
+    """
+    def __init__(self, ischeme, dtype=float, fill_value=None, item_shape=(),
+                 path=None, _data=None):
+        self._plan = ischeme.compile()
+        if self._plan.length is None:
+            raise ValueError("scheme with stream has no grid shape")
+
+        skip = 1 if ischeme.has_constants else 0
+        names = ischeme.level_names()[skip:]
+        self.axes = [level[0] if len(level) == 1 else tuple(level) for level in names]
+        self.shape = tuple(self._plan.sizes[skip:])
+        self.coords = {}
+        self._axis_of = {}
+        for axis, (level, level_names) in enumerate(zip(self._plan.levels[skip:], names)):
+            for var, name in zip(level, level_names):
+                column = _column_source(var)
+                if isinstance(column, LazySequence):
+                    column = column[numpy.arange(self.shape[axis])]
+                self.coords[name] = column[:self.shape[axis]]
+                self._axis_of[name] = axis
+
+        item_shape = tuple(item_shape)
+        if _data is not None:
+            self.data = _data
+        else:
+            full_shape = self.shape + item_shape
+            if path is not None:
+                self.data = open_memmap(path, mode='w+', dtype=dtype, shape=full_shape)
+            else:
+                self.data = numpy.empty(full_shape, dtype=dtype)
+            if fill_value is None and numpy.issubdtype(self.data.dtype, numpy.inexact):
+                fill_value = numpy.nan
+            self.data[...] = 0 if fill_value is None else fill_value
+
+        # Constants level has size 1, so C order of the grid is the
+        # canonical order of the full product
+        self._flat = self.data.reshape((-1,) + self.data.shape[len(self.shape):])
+
+    @classmethod
+    def open(cls, ischeme, path, mode='r+'):
+        """Opens grid stored in :arg:`path` for :arg:`ischeme`.
+        """
+        data = numpy.load(path, mmap_mode=mode)
+        grid = cls(ischeme, _data=data)
+        if data.shape[:len(grid.shape)] != grid.shape:
+            raise ValueError("grid in {} has shape {}, scheme needs {}".format(
+                path, data.shape, grid.shape))
+        return grid
+
+    def __setitem__(self, index, value):
+        """Stores result of point with flat :arg:`index` (or numpy
+        array of indices with array of values).
+        """
+        self._flat[self._plan.canonical(index)] = value
+
+    def __getitem__(self, index):
+        """Result of point with flat :arg:`index`.
+        """
+        return self._flat[self._plan.canonical(index)]
+
+    def fill(self, results, with_index=True):
+        """Stores results from iterable of (index, result) pairs, e.g.
+        ``scheme.map(func, with_index=True)``, or, without
+        :arg:`with_index`, results in scheme order.
+        """
+        if not with_index:
+            results = enumerate(results)
+        for index, result in results:
+            self[index] = result
+        return self
+
+    def flush(self):
+        """Writes changes of memory mapped grid to disk.
+        """
+        if isinstance(self.data, numpy.memmap):
+            self.data.flush()
+
+    def _position(self, name, value):
+        if name not in self._axis_of:
+            raise KeyError("no axis for {!r}".format(name))
+        positions = numpy.flatnonzero(self.coords[name] == value)
+        if not len(positions):  # pylint: disable=len-as-condition
+            raise KeyError("{!r} has no coordinate {!r}".format(name, value))
+        return self._axis_of[name], int(positions[0])
+
+    def sel(self, **coords):
+        """Selects results by coordinate values, e.g.
+        ``grid.sel(T=300.0)``. Only basic indexing is used, so result
+        is a view of the grid, not a copy.
+        """
+        key = [slice(None)] * len(self.shape)
+        for name, value in coords.items():
+            axis, position = self._position(name, value)
+            key[axis] = position
+        return self.data[tuple(key)]
+
+    def isel(self, **positions):
+        """Selects results by positions along named axes, view like
+        :meth:`sel`.
+        """
+        key = [slice(None)] * len(self.shape)
+        for name, position in positions.items():
+            if name not in self._axis_of:
+                raise KeyError("no axis for {!r}".format(name))
+            key[self._axis_of[name]] = position
+        return self.data[tuple(key)]
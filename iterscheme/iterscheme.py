@@ -7,8 +7,21 @@
 """
 
 
-from itertools import product
+import hashlib
+import inspect
+import json
+import operator
+import pickle
+from bisect import bisect_right
+from functools import cached_property, wraps
+from itertools import accumulate, chain, product
 from collections import namedtuple
+import numpy
+from .parallel import parallel_map
+from .aio import AsyncMap, scheme_aiter
+from .adaptive import AdaptiveMap
+from .sources import LazySequence, Stream, is_lazy
+from .sampling import sample_indices
 
 
 class IterationSchemeElement():
@@ -122,6 +135,460 @@ class IterationSchemeElement():
             return [v.variables for v in self._variables]
 
 
+def _flatten(nested_values):
+    return tuple(chain.from_iterable(nested_values))
+
+
+def _key(values):
+    """Hashable key of tuple of level values. Unhashable values are
+    encoded exactly (numpy arrays by dtype, shape and bytes), so that
+    different values never share a key.
+    """
+    try:
+        hash(values)
+        return values
+    except TypeError:
+        return tuple(_exact_key(value) for value in values)
+
+
+def _exact_key(value):
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        pass
+    if isinstance(value, numpy.ndarray):
+        if value.dtype.hasobject:
+            return ('ndarray', value.shape, tuple(_exact_key(v) for v in value.ravel()))
+        return ('ndarray', value.dtype.str, value.shape,
+                numpy.ascontiguousarray(value).tobytes())
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_exact_key(v) for v in value))
+    if isinstance(value, dict):
+        return ('dict', tuple((_exact_key(k), _exact_key(v)) for k, v in value.items()))
+
+    return (type(value).__name__, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+# Generated loop functions, shared by all plans of the same shape
+_LOOPS = {}
+
+# Python limits number of statically nested blocks to 20
+_MAX_LOOPS = 18
+
+
+def _loops(widths, hoisted):
+    """Generates function with real nested ``for`` loops over zipped
+    components of levels with given numbers of variables, which yields
+    flat tuples of values. First :arg:`hoisted` levels have exactly one
+    position and are unpacked once before the loops (constants level,
+    fixed outer positions of a span). For example widths (1, 1, 2) and
+    one hoisted level give::
+
+        def loops(components):
+            (c0, c1, c2,) = components
+            (v0_0,) = c0[0]
+            for (v1_0,) in c1:
+                for (v2_0, v2_1,) in c2:
+                    yield (v0_0, v1_0, v2_0, v2_1,)
+
+    Returns None for schemes nested too deep for Python compiler.
+    """
+    key = (widths, hoisted)
+    if key in _LOOPS:
+        return _LOOPS[key]
+    if len(widths) - hoisted > _MAX_LOOPS:
+        return None
+
+    lines = ['def loops(components):']
+    if widths:
+        lines.append('    ({},) = components'.format(
+            ', '.join('c{}'.format(i) for i in range(len(widths)))))
+    names = []
+    indent = '    '
+    for level, width in enumerate(widths):
+        level_names = ['v{}_{}'.format(level, i) for i in range(width)]
+        target = '({},)'.format(', '.join(level_names)) if width else '()'
+        names.extend(level_names)
+        if level < hoisted:
+            lines.append('{}{} = c{}[0]'.format(indent, target, level))
+        else:
+            lines.append('{}for {} in c{}:'.format(indent, target, level))
+            indent += '    '
+    lines.append('{}yield ({})'.format(indent, ''.join(n + ', ' for n in names)))
+
+    namespace = {}
+    exec('\n'.join(lines), namespace)  # pylint: disable=exec-used
+    _LOOPS[key] = namespace['loops']
+    return namespace['loops']
+
+
+def _iter_product(widths, components):
+    """Flat tuples of the product of zipped :arg:`components`
+    produced by generated loops.
+    """
+    hoisted = 0
+    for component in components:
+        if len(component) != 1:
+            break
+        hoisted += 1
+    loops = _loops(widths, hoisted)
+    if loops is None:
+        return map(_flatten, product(*components))
+
+    return loops(components)
+
+
+class _LevelPasses():
+    """Zipped values of lazy level for generated loops, every pass
+    over it zips values again, so they are never stored.
+    """
+    __slots__ = ('_level', '_size')
+
+    def __init__(self, level, size):
+        self._level = level
+        self._size = size
+
+    def __iter__(self):
+        return zip(*self._level)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        return tuple(var[index] for var in self._level)
+
+
+class IterationPlan(namedtuple('IterationPlan',
+                               'levels sizes strides length '
+                               'depth prefixes')):
+    """:class:`iterscheme.IterationPlan` is immutable compiled form
+    of :class:`iterscheme.IterationScheme`. It holds normalized levels,
+    their sizes and strides of flat index decoding. Zipped values of
+    every level (:attr:`components`) are built on the first full
+    iteration and kept for the next ones, length, indexing and range
+    iteration don't need them.
+
+    Scheme with constraints is pruned at outer levels: :attr:`prefixes`
+    is sorted array of canonical indices of valid combinations of
+    levels up to :attr:`depth`, all levels below depth run in full.
+    Flat indices of the plan go over valid points only,
+    :meth:`canonical` converts them into indices in the full product.
+
+    Plan doesn't change during iteration, so it can be shared between
+    threads, every :meth:`iterator` call gives independent iterator
+    (single iterator is not meant to be shared between threads).
+    """
+
+    @classmethod
+    def compile(cls, nested_variables, constraints=(), pruning=None):
+        """Builds plan from nested variables structure. :arg:`constraints`
+        are (level, check) pairs, where check is called with flat tuple
+        of values of levels up to level. Already computed
+        (depth, prefixes) can be given as :arg:`pruning`, constraints
+        then prune remaining points further.
+        """
+        levels = tuple(tuple(level) for level in cls._normalize(nested_variables))
+        sizes = tuple(cls._level_size(level) for level in levels)
+        if None in sizes[:-1]:
+            raise ValueError("only the innermost level can be a stream")
+        strides, length = cls._compute_strides(sizes)
+
+        depth, prefixes = pruning or (None, None)
+        if constraints:
+            if length is None:
+                raise ValueError("constraints aren't supported with streams")
+            pruned = None
+            if prefixes is not None:
+                pruned = (depth, set(numpy.asarray(prefixes).tolist()))
+            depth = max([level for level, _ in constraints] + [pruned[0] if pruned else 0])
+            prefixes = cls._valid_prefixes(levels, sizes, depth, constraints, pruned)
+        if prefixes is not None:
+            length = len(prefixes) * strides[depth]
+
+        return cls(levels, sizes, strides, length, depth, prefixes)
+
+    @staticmethod
+    def _valid_prefixes(levels, sizes, depth, constraints, pruned=None):
+        """Walks levels up to :arg:`depth` and skips subtrees of values
+        rejected by checks of their level. :arg:`pruned` is (depth, set
+        of prefixes) of earlier pruning, other prefixes are skipped too.
+        """
+        checks = [[check for level, check in constraints if level == i]
+                  for i in range(depth + 1)]
+        pruned_depth, pruned = pruned or (None, None)
+        prefixes = []
+
+        def walk(level, prefix, bound):
+            for digit, values in enumerate(zip(*levels[level])):
+                index = prefix * sizes[level] + digit
+                if level == pruned_depth and index not in pruned:
+                    continue
+                values = bound + values
+                if not all(check(values) for check in checks[level]):
+                    continue
+                if level == depth:
+                    prefixes.append(index)
+                else:
+                    walk(level + 1, index, values)
+
+        walk(0, 0, ())
+        return numpy.array(prefixes, dtype=numpy.int64)
+
+    @staticmethod
+    def _normalize(nested_variables):
+        """Packs scalar constants into one-element sequences, so that
+        constants level behaves like any other loop level, or drops
+        constants level when there are no constants at all.
+        """
+        constants, loops = nested_variables[0], list(nested_variables[1:])
+        if constants:
+            return [tuple([v] for v in constants)] + loops
+
+        return loops
+
+    @staticmethod
+    def _level_size(level):
+        if any(isinstance(var, Stream) for var in level):
+            return None
+
+        return min((len(var) for var in level), default=0)
+
+    @staticmethod
+    def _compute_strides(sizes):
+        if None in sizes:
+            return None, None
+
+        strides = []
+        stride = 1
+        for size in reversed(sizes):
+            strides.append(stride)
+            stride *= size
+        strides.reverse()
+        return tuple(strides), stride
+
+    @property
+    def lazy(self):
+        """True when some level is computed on demand.
+        """
+        return any(is_lazy(var) for level in self.levels for var in level)
+
+    @cached_property
+    def components(self):
+        """Zipped values of every level, None for lazy plan.
+        """
+        if self.lazy:
+            return None
+
+        return tuple(tuple(zip(*level)) for level in self.levels)
+
+    def canonical(self, index):
+        """Converts flat index (or numpy array of them) into index
+        in the full product of levels.
+        """
+        if self.prefixes is None:
+            return index
+
+        inner = self.strides[self.depth]
+        return self.prefixes[index // inner] * inner + index % inner
+
+    def logical(self, canonical):
+        """Inverse of :meth:`canonical` for numpy array of indices in
+        the full product, indices of points removed by constraints
+        become -1.
+        """
+        canonical = numpy.asarray(canonical, dtype=numpy.int64)
+        if self.prefixes is None:
+            return canonical
+
+        inner = self.strides[self.depth]
+        prefix = canonical // inner
+        position = numpy.searchsorted(self.prefixes, prefix)
+        found = position < len(self.prefixes)
+        found[found] = self.prefixes[position[found]] == prefix[found]
+        return numpy.where(found, position * inner + canonical % inner, -1)
+
+    def subtree_end(self, index, level):
+        """Flat index right after the last point which has the same
+        positions on levels up to :arg:`level` as point :arg:`index`
+        (the end of the plan for level -1).
+        """
+        if level < 0:
+            return self.length
+        stride = self.strides[level]
+        end = (int(self.canonical(index)) // stride + 1) * stride
+        if self.prefixes is None:
+            return end
+
+        inner = self.strides[self.depth]
+        block = end // inner
+        position = int(numpy.searchsorted(self.prefixes, block))
+        if position < len(self.prefixes) and self.prefixes[position] == block:
+            return position * inner + end % inner
+        return position * inner
+
+    def _canonical_ranges(self, start, stop):
+        """Converts flat index range into ranges of the full product.
+        """
+        if start >= stop:
+            return
+        if self.prefixes is None:
+            yield start, stop
+            return
+
+        inner = self.strides[self.depth]
+        low = high = None
+        for block in range(start // inner, -(-stop // inner)):
+            base = int(self.prefixes[block]) * inner - block * inner
+            block_low = base + max(start, block * inner)
+            block_high = base + min(stop, (block + 1) * inner)
+            if block_low == high:
+                high = block_high
+                continue
+            if high is not None:
+                yield low, high
+            low, high = block_low, block_high
+        yield low, high
+
+    def digits(self, index):
+        """Decodes flat index into per-level positions (mixed radix
+        with the innermost level changing fastest).
+        """
+        index = self.canonical(index)
+        return [(index // stride) % size
+                for stride, size in zip(self.strides, self.sizes)]
+
+    def point(self, digits):
+        """Tuple of values for per-level positions.
+        """
+        return tuple(var[d]
+                     for level, d in zip(self.levels, digits)
+                     for var in level)
+
+    def _spans(self, low, high, depth=0, prefix=()):
+        """Covers range [low, high) of the full product within subtree
+        at :arg:`depth` by spans (prefix, depth, first, last): positions
+        of levels above depth are fixed by prefix, level at depth runs
+        over positions [first, last) and levels below it run in full.
+        """
+        stride = self.strides[depth]
+        first, last = low // stride, -(-high // stride)
+        if last - first == 1 and (low % stride or high % stride):
+            yield from self._spans(low - first * stride, high - first * stride,
+                                   depth + 1, prefix + (first,))
+            return
+
+        if low % stride:
+            yield from self._spans(low % stride, stride, depth + 1, prefix + (first,))
+            first += 1
+        if high % stride:
+            last -= 1
+        if first < last:
+            yield prefix, depth, first, last
+        if high % stride:
+            yield from self._spans(0, high % stride, depth + 1, prefix + (last,))
+
+    def spans(self, start, stop):
+        """Splits flat index range [start, stop) into spans (prefix,
+        depth, first, last): positions of levels above depth are fixed
+        by prefix, level at depth runs over positions [first, last) and
+        levels below it run in full. Plan without levels has single
+        span ((), 0, 0, 1).
+        """
+        for low, high in self._canonical_ranges(start, stop):
+            if not self.sizes:
+                yield (), 0, 0, 1
+            else:
+                yield from self._spans(low, high)
+
+    def iter_range(self, start, stop):
+        """Yields points with flat indices in [start, stop). Range is
+        split into spans which are iterated by generated loops with
+        fixed outer positions. Inner levels are zipped once per call
+        unless :attr:`components` are already built, partly covered
+        level is zipped over its covered positions only.
+        """
+        if self.lazy:
+            for low, high in self._canonical_ranges(start, stop):
+                yield from self._iter_range_lazy(low, high)
+            return
+
+        components = self.__dict__.get('components')
+        zipped = {}
+
+        def component(level):
+            if components is not None:
+                return components[level]
+            if level not in zipped:
+                zipped[level] = tuple(zip(*self.levels[level]))
+            return zipped[level]
+
+        widths = tuple(map(len, self.levels))
+        for prefix, depth, first, last in self.spans(start, stop):
+            parts = [(tuple(var[d] for var in level),)
+                     for level, d in zip(self.levels, prefix)]
+            if depth < len(widths):
+                if (first, last) == (0, self.sizes[depth]):
+                    parts.append(component(depth))
+                elif components is not None:
+                    parts.append(components[depth][first:last])
+                else:
+                    parts.append(tuple(zip(*(var[first:last] for var in self.levels[depth]))))
+                parts.extend(component(level) for level in range(depth + 1, len(widths)))
+            yield from _iter_product(widths, parts)
+
+    def _iter_range_lazy(self, start, stop):
+        """Odometer over per-level positions of the full product,
+        only the first index is decoded.
+        """
+        digits = [(start // stride) % size
+                  for stride, size in zip(self.strides, self.sizes)]
+        sizes = self.sizes
+        last = len(digits) - 1
+        for _ in range(start, stop):
+            yield self.point(digits)
+            level = last
+            while level >= 0:
+                digits[level] += 1
+                if digits[level] < sizes[level]:
+                    break
+                digits[level] = 0
+                level -= 1
+
+    def _iter_nested(self, depth=0, prefix=()):
+        """Nested loops over zipped levels. Unlike
+        :func:`itertools.product` it doesn't turn levels into tuples,
+        so lazy sources are walked again for every outer combination.
+        """
+        if depth == len(self.levels):
+            yield prefix
+            return
+
+        for values in zip(*self.levels[depth]):
+            yield from self._iter_nested(depth + 1, prefix + (values,))
+
+    def iterator(self):
+        """Fresh iterator over points of the plan. Iteration returns
+        plain tuple of values without annotation of any kind. User
+        can only rely on order of values in this tuple. If elements
+        look like `ISE(x) >> ISE(y,z) >> ISE(w)` then every tuple
+        is (element_of_x, element_of_y, element_of_z, element_of_w)
+        """
+        if self.prefixes is not None:
+            return self.iter_range(0, self.length)
+        if self.length is None:
+            return map(_flatten, self._iter_nested())
+        if self.lazy:
+            # Lazy levels are zipped anew on every pass of generated loops
+            components = tuple(_LevelPasses(level, size)
+                               if any(is_lazy(var) for var in level)
+                               else tuple(zip(*level))
+                               for level, size in zip(self.levels, self.sizes))
+            return _iter_product(tuple(map(len, self.levels)), components)
+
+        return _iter_product(tuple(map(len, self.levels)), self.components)
+
+
 class IterationScheme():
     """:class:`iterscheme.IterationScheme` object represents
     nested for loop structure, which support linear iteration
@@ -129,14 +596,68 @@ class IterationScheme():
 
     Constructor supports :class:`iterscheme.IterationSchemeElement`
     as :arg:`nested_variables`, but one can build this structure
-    manually.
+    manually. Structure is compiled into :class:`iterscheme.IterationPlan`
+    right away, values must not be modified afterwards. :arg:`pruning`
+    is (depth, prefixes) of a scheme whose constraints are no longer
+    available (e.g. unpickled one), see :class:`iterscheme.IterationPlan`.
     """
-    def __init__(self, nested_variables):
+    def __init__(self, nested_variables, constraints=(), pruning=None):
         if isinstance(nested_variables, IterationSchemeElement):
             self._nested_variables = nested_variables.nested_variables
         else:
             self._nested_variables = nested_variables
-        self._iterator = None
+        self._constraints = tuple(constraints)
+        self._pruning = pruning
+        self._plan = IterationPlan.compile(self._nested_variables,
+                                           self._constraints, pruning)
+
+    def where(self, predicate, level=None):
+        """Returns new scheme without points rejected by :arg:`predicate`.
+
+        By default predicate arguments are matched by name with named
+        parameters, e.g. ``scheme.where(lambda x, y: y < x)``. Predicate is
+        checked as soon as the innermost of its parameters is bound, so
+        whole inner subtrees of rejected values are never generated.
+        With :arg:`level` (index of element in the scheme, constants
+        are level 0) predicate gets single tuple of values of all levels
+        up to the given one instead.
+
+        Length, random access, sharding and adapters of the new scheme
+        work over remaining points only.
+        """
+        widths = [len(level) for level in self._plan.levels]
+        has_constants = bool(self._nested_variables[0])
+
+        if level is not None:
+            plan_level = level if has_constants else level - 1
+            if not 0 <= plan_level < len(widths):
+                raise ValueError("no level {} in the scheme".format(level))
+            check = predicate
+        else:
+            names = self.column_names()
+            positions = []
+            for name in inspect.signature(predicate).parameters:
+                if name not in names:
+                    raise ValueError("predicate argument {!r} is not "
+                                     "a parameter of the scheme".format(name))
+                positions.append(names.index(name))
+
+            bounds = list(accumulate(widths))
+            plan_level = max((bisect_right(bounds, position) for position in positions),
+                             default=0)
+
+            def check(values):
+                return predicate(*[values[position] for position in positions])
+
+        return IterationScheme(self._nested_variables,
+                               self._constraints + ((plan_level, check),),
+                               self._pruning)
+
+    def compile(self):
+        """Returns immutable :class:`iterscheme.IterationPlan`
+        of the scheme.
+        """
+        return self._plan
 
     def properties(self, property_getter):
         """With :func:`property_getter` supplied creates list
@@ -146,42 +667,398 @@ class IterationScheme():
                 for nested_var in self._nested_variables
                 for var in nested_var]
 
+    def __len__(self):
+        """Number of points in the scheme, i.e. product of level sizes.
+        """
+        if self._plan.length is None:
+            raise TypeError("iteration scheme with stream has no length")
+
+        return self._plan.length
+
+    def __getitem__(self, key):
+        """Random access to points by flat index without walking
+        the product. ``scheme[k]`` is the same tuple as the k-th
+        value produced by iteration, slices return list of such tuples.
+        """
+        plan = self._plan
+        length = len(self)
+        if isinstance(key, slice):
+            return [plan.point(plan.digits(k)) for k in range(length)[key]]
+
+        index = operator.index(key)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("iteration scheme index out of range")
+
+        return plan.point(plan.digits(index))
+
     def __iter__(self):
-        """TODO: Explain packing of scalar arguments and other things
+        """Every call returns new independent iterator, see
+        :meth:`iterscheme.IterationPlan.iterator`. Constants are
+        packed into one-element sequences, so every level is zipped
+        and fed to :func:`itertools.product`. Schemes with lazy
+        sources are iterated level by level without materializing them.
         """
-        if self._nested_variables[0]:
-            self._nested_variables[0] = \
-                    tuple([v] for v in self._nested_variables[0])
-        else:
-            self._nested_variables = self._nested_variables[1:]    
+        return self._plan.iterator()
 
-        product_components = (zip(*v) for v in self._nested_variables)
-        self._iterator = product(*product_components)
-        return self
+    def __getstate__(self):
+        # Plan is rebuilt on unpickling, so values are sent only once.
+        # Constraints may be lambdas, results of pruning are sent instead.
+        plan = self._plan
+        return {'_nested_variables': self._nested_variables,
+                'pruning': (plan.depth, plan.prefixes)}
 
-    def __next__(self):
-        """Iteration scheme returs plain tuple of values
-        without annotation of any kind. User can only rely
-        on order of values in this tuple. If elements look
-        like `ISE(x) >> ISE(y,z) >> ISE(w)` then every tuple
-        is (element_of_x, element_of_y, element_of_z, element_of_w)
+    def __setstate__(self, state):
+        self._nested_variables = state['_nested_variables']
+        self._constraints = ()
+        self._pruning = state['pruning'] if state['pruning'][1] is not None else None
+        self._plan = IterationPlan.compile(self._nested_variables,
+                                           pruning=self._pruning)
+
+    def to_spec(self):
+        """Compact JSON-compatible description of the scheme: names and
+        values of variables, lazy progressions are described by their
+        parameters. Sources computed by arbitrary functions and values
+        which are not plain scalars, strings, lists or numpy arrays
+        can't be described and raise :exc:`ValueError`, as well as
+        schemes which would be restored with different values (numpy
+        scalars in lists, tuple or array constants, nested tuples).
+        """
+        if self._plan.prefixes is not None:
+            raise ValueError("scheme with constraints can't be described by spec")
+
+        # Imported here, spec module depends on named parameters
+        from .spec import scheme_spec  # pylint: disable=import-outside-toplevel
+        spec = scheme_spec(self._nested_variables)
+        try:
+            restored = type(self).from_spec(json.loads(json.dumps(spec)))
+        except TypeError as error:
+            raise ValueError("scheme can't be described by spec: {}".format(error)) from error
+        if restored.fingerprint() != self.fingerprint():
+            raise ValueError("scheme restored from spec would differ from original, "
+                             "use plain values or numpy arrays as levels")
+        return spec
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Restores scheme from :meth:`to_spec` description.
+        """
+        from .spec import nested_variables_from_spec  # pylint: disable=import-outside-toplevel
+        return cls(nested_variables_from_spec(spec))
+
+    def sample_indices(self, k, method='uniform', seed=0, shard=None):
+        """Flat indices of :arg:`k` points chosen without walking the
+        product. See :func:`iterscheme.sampling.sample_indices` for
+        methods, reproducibility and sharding.
+        """
+        return sample_indices(self._plan, k, method=method, seed=seed, shard=shard)
+
+    def sample(self, k, method='uniform', seed=0, shard=None, adapter=None):
+        """List of :arg:`k` points (adapted with :arg:`adapter`, when
+        given) chosen by :meth:`sample_indices`::
+
+            scheme.sample(10000, method='sobol', seed=1, shard=(0, 4))
+        """
+        plan = self._plan
+        points = [plan.point(plan.digits(int(i)))
+                  for i in self.sample_indices(k, method, seed, shard)]
+        if adapter is not None:
+            adapt = adapter.compile(self)
+            return [adapt(point) for point in points]
+
+        return points
+
+    def staged(self, *stages, cache_size=16):
+        """Function over points of the scheme evaluated in stages, one
+        per level, see :class:`iterscheme.Staged`.
+        """
+        from .staged import Staged  # pylint: disable=import-outside-toplevel
+        return Staged([len(level) for level in self._plan.levels], stages,
+                      cache_size=cache_size)
+
+    def shared(self, min_bytes=1 << 20):
+        """Returns :class:`iterscheme.SharedScheme`, owner of shared
+        memory blocks, whose :attr:`scheme` (also target of ``with``
+        block) is copy of this scheme with large numpy arrays in
+        shared memory.
+        """
+        from .shared import SharedScheme  # pylint: disable=import-outside-toplevel
+        return SharedScheme(self, min_bytes=min_bytes)
+
+    def extension(self, old):
+        """Points of this scheme which are not in :arg:`old` scheme,
+        see :class:`iterscheme.Extension`::
+
+            for index, result in scheme.extension(previous).map(func): ...
+        """
+        from .extension import Extension  # pylint: disable=import-outside-toplevel
+        return Extension(old, self)
+
+    def shards(self, n):
+        """Cuts the whole product into :arg:`n` contiguous ranges of flat
+        indices, sizes of which differ at most by one point regardless
+        of level sizes. Returns list of :class:`iterscheme.Shard`.
         """
-        return tuple(i for v in next(self._iterator) for i in v)
+        if n < 1:
+            raise ValueError("number of shards must be positive")
 
+        length = len(self)
+        bounds = [i * length // n for i in range(n + 1)]
+        return [Shard(self, start, stop)
+                for start, stop in zip(bounds[:-1], bounds[1:])]
 
-def adapter(property_getter):
+    @property
+    def has_constants(self):
+        """Whether the scheme has constants level.
+        """
+        return bool(self._nested_variables[0])
+
+    def level_names(self):
+        """:meth:`column_names` grouped by levels of the plan
+        (constants level, when present, goes first).
+        """
+        names = iter(self.column_names())
+        return [[next(names) for _ in level] for level in self._plan.levels]
+
+    def column_names(self):
+        """Names of the variables in point order. Named parameters
+        give their name, other variables are called like fields
+        of numpy structured arrays: ``f0``, ``f1`` and so on.
+        """
+        return [getattr(var, 'parameter_name', 'f{}'.format(i))
+                for i, var in enumerate(self.properties(lambda v: v))]
+
+    def iter_batches(self, batch_size):
+        """Yields points in batches of at most :arg:`batch_size` rows.
+        Every batch is a dict which maps :meth:`column_names` to
+        1d arrays, rows go in the same order as in plain iteration.
+        Columns are built by vectorized decoding of flat indices, numpy
+        backed variables keep their dtype.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+
+        plan = self._plan
+        names = self.column_names()
+        sources = [[_column_source(var) for var in level]
+                   for level in plan.levels]
+        length = len(self)
+
+        for start in range(0, length, batch_size):
+            indices = plan.canonical(numpy.arange(start, min(start + batch_size, length)))
+            columns = []
+            for stride, size, level in zip(plan.strides, plan.sizes, sources):
+                digits = (indices // stride) % size
+                columns.extend(source[digits] for source in level)
+            yield dict(zip(names, columns))
+
+    def fingerprint(self):
+        """Hex digest which identifies the scheme by its level sizes,
+        variable names and values.
+        """
+        digest = hashlib.sha256()
+        digest.update(repr(list(self._plan.sizes)).encode())
+        digest.update(repr(self.column_names()).encode())
+        for level in self._plan.levels:
+            for var in level:
+                _hash_values(digest, var)
+        if self._plan.prefixes is not None:
+            digest.update(repr(self._plan.depth).encode())
+            digest.update(self._plan.prefixes.tobytes())
+
+        return digest.hexdigest()
+
+    def map(self, func, workers=None, chunksize=None, ordered=True,
+            adapter=None, with_index=False, journal=None, monitor=None):
+        """Evaluates :arg:`func` over every point on a process pool.
+        See :func:`iterscheme.parallel.parallel_map` for details.
+        """
+        return parallel_map(self, func, workers=workers, chunksize=chunksize,
+                            ordered=ordered, adapter=adapter,
+                            with_index=with_index, journal=journal,
+                            monitor=monitor)
+
+    def traverse(self, order='lexicographic', adapter=None, with_index=False):
+        """Iterates over points in :arg:`order`: ``lexicographic`` (the
+        usual one), ``serpentine`` or ``gray``, see
+        :func:`iterscheme.traversal.ordered_digits`. The last two change
+        one parameter between consecutive points, inner ones most often,
+        which helps when evaluation is warm-started from the previous
+        point. With :arg:`with_index` yields (flat_index, point) pairs,
+        flat index is the usual scheme index, so results can be stored
+        in scheme order (e.g. in :class:`iterscheme.ResultGrid`).
+        """
+        from .traversal import iter_traversal  # pylint: disable=import-outside-toplevel
+        points = iter_traversal(self._plan, order, with_index=with_index)
+        if adapter is None:
+            return points
+        adapt = adapter.compile(self)
+        if with_index:
+            return ((index, adapt(point)) for index, point in points)
+        return map(adapt, points)
+
+    def traversal_indices(self, order='lexicographic'):
+        """Numpy array of flat indices of points in :arg:`order`
+        of :meth:`traverse`.
+        """
+        from .traversal import traversal_indices  # pylint: disable=import-outside-toplevel
+        return traversal_indices(self._plan, order)
+
+    def adaptive_map(self, func, workers=None, chunksize=None, ordered=True,
+                     adapter=None, with_index=False):
+        """Evaluates :arg:`func` like :meth:`map`, but function can skip
+        the rest of an axis or a subtree by returning
+        :class:`iterscheme.StopAxis` or :class:`iterscheme.SkipSubtree`.
+        Returns :class:`iterscheme.AdaptiveMap`, skipped points are
+        recorded in its ``skipped`` attribute.
+        """
+        return AdaptiveMap(self, func, workers=workers, chunksize=chunksize,
+                           ordered=ordered, adapter=adapter, with_index=with_index)
+
+    def aiter(self, adapter=None):
+        """Asynchronous iteration over points, optionally
+        adapted with :arg:`adapter`::
+
+            async for point in scheme.aiter(): ...
+        """
+        return scheme_aiter(self, adapter)
+
+    def amap(self, coro_func, concurrency=16, ordered=True, adapter=None,
+             with_index=False):
+        """Evaluates coroutine function :arg:`coro_func` over every point
+        with at most :arg:`concurrency` evaluations running at once.
+        Next point is taken only when there is a free slot. Results go in
+        scheme order or, without :arg:`ordered`, as they complete::
+
+            results = await scheme.amap(fetch, concurrency=8)
+            async for result in scheme.amap(fetch, ordered=False): ...
+
+        Cancellation of the consumer or an exception in any evaluation
+        cancels all running evaluations.
+        """
+        return AsyncMap(self, coro_func, concurrency, ordered=ordered,
+                        adapter=adapter, with_index=with_index)
+
+
+class Shard():
+    """:class:`iterscheme.Shard` is a range [start, stop) of flat indices
+    of :class:`iterscheme.IterationScheme`. Iteration produces only
+    points of the range, in scheme order.
+    """
+    def __init__(self, ischeme, start, stop):
+        self.ischeme = ischeme
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self):
+        return self.ischeme.compile().iter_range(self.start, self.stop)
+
+    def __getitem__(self, key):
+        """Point by index relative to the shard start, list of points
+        for a slice.
+        """
+        if isinstance(key, slice):
+            return [self.ischeme[i] for i in range(self.start, self.stop)[key]]
+
+        return self.ischeme[range(self.start, self.stop)[key]]
+
+    def indices(self):
+        """Flat indices of the shard points in the scheme.
+        """
+        return range(self.start, self.stop)
+
+    def __repr__(self):
+        return 'Shard({}, {})'.format(self.start, self.stop)
+
+
+def _column_source(variable):
+    """Converts variable values into 1d array suitable for fancy
+    indexing. Values which numpy can't represent as flat array
+    of scalars (vectors, ragged data) are stored as objects.
+    """
+    if isinstance(variable, numpy.ndarray):
+        return numpy.asarray(variable)
+    if isinstance(variable, LazySequence):
+        return variable
+    if isinstance(variable, range):
+        return numpy.arange(variable.start, variable.stop, variable.step)
+
+    return _to_column(list(variable))
+
+
+def _to_column(values):
+    """1d array of list of :arg:`values`, values which aren't flat
+    scalars are stored as objects (also used by column sink).
+    """
+    try:
+        column = numpy.asarray(values)
+    except ValueError:
+        column = None
+    if column is None or column.ndim != 1:
+        column = numpy.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            column[i] = value
+
+    return column
+
+
+def _hash_values(digest, variable):
+    if isinstance(variable, LazySequence) and variable.describe() is not None:
+        digest.update(repr(variable.describe()).encode())
+    elif isinstance(variable, range):
+        digest.update(repr(variable).encode())
+    elif isinstance(variable, numpy.ndarray):
+        array = numpy.ascontiguousarray(variable)
+        digest.update(array.dtype.str.encode())
+        digest.update(repr(array.shape).encode())
+        digest.update(array.tobytes() if array.dtype != object
+                      else repr(array.tolist()).encode())
+    else:
+        digest.update(type(variable).__name__.encode())
+        for value in variable:
+            digest.update(repr(value).encode())
+            digest.update(b'\0')
+
+
+def adapter(property_getter, compiled=False):
     """:func:`iterscheme.adapter` transforms pure tuple output
     from :class:`iterscheme.IterationScheme` object to representation
     described by :arg:`adapter_func` of :func:`getter_assigned`.
     :arg:`property_getter` describes how property assigned to single
     variable from `IterationScheme` object can be extracted.
+
+    Plain adapter function is called as ``adapter_func(values,
+    properties)`` for every point. With :arg:`compiled` it is called
+    once per scheme as ``adapter_func(properties)`` and must return
+    function of point values only, so that record types, key lists
+    and other per-scheme things are built once.
+
+    Decorated adapter is a generator function over a scheme, its
+    ``compile(ischeme)`` attribute returns the per-point function.
     """
     def getter_assigned(adapter_func):
-        def adapted(ischeme):
+        def compile_for(ischeme):
+            """Binds scheme properties once and returns function
+            which adapts single tuple of values.
+            """
             properties = ischeme.properties(property_getter)
-            for bunch_of_values in ischeme:
-                yield adapter_func(bunch_of_values, properties)
+            if compiled:
+                return adapter_func(properties)
+
+            def adapt(bunch_of_values):
+                return adapter_func(bunch_of_values, properties)
+
+            return adapt
+
+        @wraps(adapter_func)
+        def adapted(ischeme):
+            yield from map(compile_for(ischeme), ischeme)
 
+        adapted.compile = compile_for
         return adapted
 
     return getter_assigned
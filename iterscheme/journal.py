@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+    journal.py
+    ~~~~~~~~~~
+
+    On-disk journal of completed points for resumable sweeps.
+"""
+
+
+import json
+import os
+
+
+def _merge(ranges):
+    """Sorts [start, stop) ranges and merges overlapping or
+    adjacent ones.
+    """
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            if stop > merged[-1][1]:
+                merged[-1][1] = stop
+        else:
+            merged.append([start, stop])
+
+    return merged
+
+
+def _coalesce(indices):
+    """Turns set of indices into list of [start, stop) ranges.
+    """
+    ranges = []
+    for index in sorted(indices):
+        if ranges and ranges[-1][1] == index:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([index, index + 1])
+
+    return ranges
+
+
+class Journal():
+    """:class:`iterscheme.Journal` records flat indices of completed
+    points of :arg:`ischeme` in file :arg:`path` as a list of index
+    ranges. Completed indices are kept in memory and appended to the
+    file, followed by fsync, every :arg:`sync_every` points and on
+    :meth:`flush`. Points may be completed in any order.
+
+    The first line of the file holds scheme fingerprint (see
+    :meth:`iterscheme.IterationScheme.fingerprint`). Opening journal
+    written for a different scheme raises :exc:`ValueError`, journal
+    with empty or torn first line is started anew.
+    """
+    def __init__(self, path, ischeme, sync_every=1000):
+        path = os.fspath(path)
+        self._path = path
+        self._length = len(ischeme)
+        self._sync_every = sync_every
+        self._pending = set()
+        self._ranges = []
+
+        fingerprint = ischeme.fingerprint()
+        if os.path.exists(path):
+            self._ranges = self._load(path, fingerprint)
+        self._rewrite(fingerprint)
+
+        self._file = open(path, 'a', encoding='utf8')
+
+    @staticmethod
+    def _load(path, fingerprint):
+        with open(path, 'r', encoding='utf8') as journal:
+            line = journal.readline()
+            try:
+                header = json.loads(line) if line.endswith('\n') else None
+            except ValueError:
+                header = None
+            if not isinstance(header, dict):
+                # Nothing was recorded after header which isn't complete
+                return []
+            if header.get('fingerprint') != fingerprint:
+                raise ValueError("journal {} was written for another "
+                                 "iteration scheme".format(path))
+            ranges = []
+            for line in journal:
+                fields = line.split()
+                # Last line may be torn by a crash in the middle of write
+                if len(fields) == 2 and line.endswith('\n'):
+                    ranges.append([int(fields[0]), int(fields[1])])
+
+        return _merge(ranges)
+
+    def _rewrite(self, fingerprint):
+        """Atomically replaces journal file with compacted content.
+        """
+        temporary = self._path + '.tmp'
+        with open(temporary, 'w', encoding='utf8') as journal:
+            journal.write(json.dumps({'fingerprint': fingerprint,
+                                      'length': self._length}) + '\n')
+            for start, stop in self._ranges:
+                journal.write('{} {}\n'.format(start, stop))
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temporary, self._path)
+
+    def add(self, index):
+        """Marks point with flat :arg:`index` as completed.
+        """
+        self._pending.add(index)
+        if len(self._pending) >= self._sync_every:
+            self.flush()
+
+    def flush(self):
+        """Writes pending indices to disk and waits for fsync.
+        """
+        if not self._pending:
+            return
+
+        ranges = _coalesce(self._pending)
+        for start, stop in ranges:
+            self._file.write('{} {}\n'.format(start, stop))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self._ranges = _merge(self._ranges + ranges)
+        self._pending.clear()
+
+    def close(self):
+        """Flushes pending indices and closes journal file.
+        """
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __contains__(self, index):
+        if index in self._pending:
+            return True
+
+        return any(start <= index < stop for start, stop in self._ranges)
+
+    @property
+    def completed(self):
+        """Number of completed points.
+        """
+        return (sum(stop - start for start, stop in self._ranges)
+                + len(self._pending))
+
+    def missing(self):
+        """List of [start, stop) ranges of points which are
+        not completed yet.
+        """
+        ranges = _merge(self._ranges + _coalesce(self._pending))
+        missing = []
+        position = 0
+        for start, stop in ranges:
+            if start > position:
+                missing.append((position, start))
+            position = max(position, stop)
+        if position < self._length:
+            missing.append((position, self._length))
+
+        return missing
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+    monitor.py
+    ~~~~~~~~~~
+
+    Opt-in timing, throughput and progress statistics of sweeps.
+"""
+
+
+import heapq
+import time
+
+
+class Histogram():
+    """Histogram of durations in nanoseconds with power of two
+    buckets. Adding a value is a single increment, so it is cheap
+    enough to be used for every point.
+    """
+    __slots__ = ('counts', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = [0] * 64
+        self.total = 0
+        self.maximum = 0
+
+    def add(self, nanoseconds):
+        """Adds one duration.
+        """
+        self.counts[nanoseconds.bit_length()] += 1
+        self.total += nanoseconds
+        if nanoseconds > self.maximum:
+            self.maximum = nanoseconds
+
+    def merge(self, other):
+        """Adds all durations of :arg:`other` histogram.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def quantile(self, q):
+        """Upper bound of :arg:`q` quantile in seconds, accurate within
+        a factor of two.
+        """
+        rank = q * len(self)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(2**bucket, self.maximum) / 1e9
+        return 0.0
+
+    def summary(self):
+        """Dict with count, total, mean, quantiles and maximum,
+        all durations are in seconds.
+        """
+        count = len(self)
+        return {'count': count,
+                'total': self.total / 1e9,
+                'mean': self.total / count / 1e9 if count else 0.0,
+                'p50': self.quantile(0.5),
+                'p90': self.quantile(0.9),
+                'p99': self.quantile(0.99),
+                'max': self.maximum / 1e9}
+
+
+class Monitor():
+    """:class:`iterscheme.Monitor` collects statistics of a sweep when
+    passed to :meth:`iterscheme.IterationScheme.map` (or used with
+    :meth:`iterate` for plain loops). Without a monitor nothing is
+    measured at all.
+
+    Durations are recorded per stage as :class:`Histogram`: ``iterate``
+    (producing point values), ``adapt`` (adapter), ``evaluate``
+    (function call) and ``handle`` (time consumer spends on a result
+    before asking for the next one). On a process pool first three are
+    measured on workers and merged as chunks arrive. :arg:`slowest`
+    points with largest evaluation time are kept with their parameter
+    values.
+
+    Hooks added by :meth:`add_hook` are called with :meth:`snapshot`
+    every :arg:`every` completed points and once when the sweep ends.
+    """
+    def __init__(self, slowest=10, every=1000):
+        self.stages = {}
+        self.points = 0
+        self.total = None
+        self.names = None
+        self._slow_points = []
+        self.slowest = slowest
+        self._every = every
+        self._next_hook = every
+        self._hooks = []
+        self._started = None
+        self._finished = None
+
+    def add_hook(self, callback):
+        """Adds :arg:`callback` called with snapshot dict.
+        """
+        self._hooks.append(callback)
+        return callback
+
+    def start(self, ischeme=None, total=None):
+        """Resets counters before a sweep of :arg:`total` points
+        (length of :arg:`ischeme` by default).
+        """
+        if ischeme is not None:
+            self.names = ischeme.column_names()
+            if total is None:
+                total = ischeme.compile().length
+        self.stages = {}
+        self.points = 0
+        self.total = total
+        self._slow_points = []
+        self._next_hook = self._every
+        self._started = time.perf_counter()
+        self._finished = None
+
+    def record(self, stage, nanoseconds):
+        """Adds duration of :arg:`stage` for one point.
+        """
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.add(nanoseconds)
+
+    def record_point(self, index, values, nanoseconds):
+        """Keeps point among the slowest ones when it is.
+        """
+        if len(self._slow_points) < self.slowest:
+            heapq.heappush(self._slow_points, (nanoseconds, index, values))
+        elif self.slowest and nanoseconds > self._slow_points[0][0]:
+            heapq.heapreplace(self._slow_points, (nanoseconds, index, values))
+
+    def stats(self):
+        """Picklable stage histograms and slowest points, see
+        :meth:`merge`.
+        """
+        return self.stages, self._slow_points
+
+    def merge(self, stats):
+        """Adds :meth:`stats` of another monitor, e.g. of a worker.
+        """
+        stages, slowest = stats
+        for stage, histogram in stages.items():
+            if stage in self.stages:
+                self.stages[stage].merge(histogram)
+            else:
+                self.stages[stage] = histogram
+        for nanoseconds, index, values in slowest:
+            self.record_point(index, values, nanoseconds)
+
+    def advance(self, count=1):
+        """Counts :arg:`count` completed points and calls hooks when
+        next :arg:`every` points are done.
+        """
+        self.points += count
+        if self._hooks and self.points >= self._next_hook:
+            self._next_hook = (self.points // self._every + 1) * self._every
+            self._call_hooks()
+
+    def finish(self):
+        """Marks the end of the sweep and calls hooks.
+        """
+        self._finished = time.perf_counter()
+        self._call_hooks()
+
+    def _call_hooks(self):
+        if self._hooks:
+            snapshot = self.snapshot()
+            for hook in self._hooks:
+                hook(snapshot)
+
+    def snapshot(self):
+        """Dict with progress, throughput, ETA in seconds (None when
+        unknown), per stage summaries (see :meth:`Histogram.summary`)
+        and the slowest points, slowest first.
+        """
+        if self._started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished or time.perf_counter()) - self._started
+        rate = self.points / elapsed if elapsed > 0 else 0.0
+        progress = eta = None
+        if self.total is not None:
+            progress = self.points / self.total if self.total else 1.0
+            if rate > 0:
+                eta = (self.total - self.points) / rate
+
+        slowest = []
+        for nanoseconds, index, values in sorted(self._slow_points, reverse=True):
+            if self.names is not None:
+                values = dict(zip(self.names, values))
+            slowest.append({'index': index, 'seconds': nanoseconds / 1e9,
+                            'values': values})
+
+        return {'points': self.points,
+                'total': self.total,
+                'elapsed': elapsed,
+                'points_per_second': rate,
+                'progress': progress,
+                'eta': eta,
+                'finished': self._finished is not None,
+                'stages': {stage: histogram.summary()
+                           for stage, histogram in self.stages.items()},
+                'slowest': slowest}
+
+    def evaluate(self, points, start, func, adapt=None):
+        """Evaluates :arg:`func` over :arg:`points` which have flat
+        indices from :arg:`start`, recording every stage. Returns
+        list of results.
+        """
+        clock = time.perf_counter_ns
+        points = iter(points)
+        results = []
+        index = start
+        while True:
+            started = clock()
+            values = next(points, _DONE)
+            iterated = clock()
+            if values is _DONE:
+                return results
+            point = adapt(values) if adapt is not None else values
+            adapted = clock()
+            results.append(func(point))
+            evaluated = clock()
+
+            self.record('iterate', iterated - started)
+            if adapt is not None:
+                self.record('adapt', adapted - iterated)
+            self.record('evaluate', evaluated - adapted)
+            self.record_point(index, values, evaluated - adapted)
+            index += 1
+
+    def iterate(self, ischeme, adapter=None):
+        """Yields points of :arg:`ischeme` (adapted with
+        :arg:`adapter`) recording ``iterate``, ``adapt`` and ``handle``
+        stages and progress::
+
+            for point in monitor.iterate(scheme): ...
+        """
+        self.start(ischeme)
+        adapt = adapter.compile(ischeme) if adapter is not None else None
+        clock = time.perf_counter_ns
+        points = iter(ischeme)
+        try:
+            while True:
+                started = clock()
+                values = next(points, _DONE)
+                iterated = clock()
+                if values is _DONE:
+                    return
+                self.record('iterate', iterated - started)
+                if adapt is not None:
+                    values = adapt(values)
+                    self.record('adapt', clock() - iterated)
+                handled = clock()
+                yield values
+                self.record('handle', clock() - handled)
+                self.advance()
+        finally:
+            self.finish()
+
+
+_DONE = object()
@@ -8,32 +8,46 @@
 
 
 from collections import namedtuple
+from functools import partial
+import keyword
+import os
+import copy
 import numpy
 from .iterscheme import adapter
+from .sources import LazySequence
+from .shared import SharedArray
 
 
-def named_parameter(name, values):
-    """Creates wrapper around values with name attribute attached.
-    Wrapper allows access to all functionality of values type.
-    """
+# Wrapper classes are shared by all parameters with the same
+# name and type of values
+_WRAPPERS = {}
 
-    inherit_from = type(values)
-    if isinstance(values, bool):
-        inherit_from = int
 
-    def prepare_cons_args(values):
-        args = list()
-        kwargs = dict()
-        if isinstance(values, (list, dict, set)):
-            args = [values]
-        elif isinstance(values, numpy.ndarray):
-            kwargs = {'shape': values.shape, 
-                      'buffer': values.data, 
-                      'dtype': values.dtype}
-        else:
-            args = [values]
+def _wrap(wrapper, values):
+    if isinstance(values, numpy.ndarray):
+        # View keeps memory (including memory maps) shared with values
+        return values.view(wrapper)
+    if isinstance(values, LazySequence):
+        return _rebind(values, wrapper)
 
-        return args, kwargs
+    return wrapper(values)
+
+
+def _rebind(values, cls):
+    """Shallow copy of lazy sequence with another class.
+    """
+    rebound = copy.copy(values)
+    rebound.__class__ = cls
+    return rebound
+
+
+def _wrapper_class(name, inherit_from):
+    """Returns cached wrapper class for :arg:`name` and
+    :arg:`inherit_from` type or creates new one.
+    """
+    key = (name, inherit_from)
+    if key in _WRAPPERS:
+        return _WRAPPERS[key]
 
     class Wrapper(inherit_from):  # pylint: disable=too-few-public-methods
         """Wrapper for collection of values that assigns
@@ -41,6 +55,8 @@ def named_parameter(name, values):
         functionality of values type.
         """
 
+        _base = inherit_from
+
         @property
         def parameter_name(self):
             """Property for identification of collection by name.
@@ -49,16 +65,52 @@ def named_parameter(name, values):
 
         def __getitem__(self, key):
             """Allows propagating of parameter name to slices.
+            Slices of numpy arrays are views of the same memory.
+            """
+            data = inherit_from.__getitem__(self, key)
+            if isinstance(key, slice) and not isinstance(data, Wrapper):
+                return _wrap(Wrapper, data)
+
+            return data
+
+        def __reduce__(self):
+            """Wrapper classes are created at runtime, so pickle
+            recreates parameter by name and plain values.
             """
-            if isinstance(key, slice):
-                data = inherit_from.__getitem__(self, key)
-                args, kwargs = prepare_cons_args(data)
-                return Wrapper(*args, **kwargs)
+            if isinstance(self, SharedArray):
+                # Transferred as shared memory block, not as data
+                return named_parameter, (name, self.view(SharedArray))
+            if isinstance(self, numpy.ndarray):
+                return named_parameter, (name, numpy.asarray(self))
+            if isinstance(self, LazySequence):
+                return named_parameter, (name, _rebind(self, inherit_from))
+
+            return named_parameter, (name, inherit_from(self))
+
+    _WRAPPERS[key] = Wrapper
+    return Wrapper
+
+
+def named_parameter(name, values, mmap_mode='r'):
+    """Creates wrapper around values with name attribute attached.
+    Wrapper allows access to all functionality of values type.
+
+    Numpy arrays (including :class:`numpy.memmap`) are wrapped without
+    copying, slices of them are views. :arg:`values` can also be a
+    path (:class:`os.PathLike`, e.g. :class:`pathlib.Path`) to ``.npy``
+    file, which is then memory mapped with :arg:`mmap_mode`. Plain
+    strings are always treated as values.
+    """
+    if isinstance(values, os.PathLike):
+        values = numpy.load(values, mmap_mode=mmap_mode)
 
-            return inherit_from.__getitem__(self, key)
+    inherit_from = type(values)
+    if hasattr(values, 'parameter_name'):
+        inherit_from = values._base  # pylint: disable=protected-access
+    if isinstance(values, bool):
+        inherit_from = int
 
-    args, kwargs = prepare_cons_args(values)
-    return Wrapper(*args, **kwargs)
+    return _wrap(_wrapper_class(name, inherit_from), values)
 
 
 def get_name(entity):
@@ -67,18 +119,96 @@ def get_name(entity):
     return entity.parameter_name
 
 
-@adapter(get_name)
-def dict_adapter(values, names):
+def get_name_and_dtype(entity):
+    """Helper function to extract name and numpy dtype of values
+    from named parameter.
+    """
+    return entity.parameter_name, numpy.asarray(entity).dtype
+
+
+@adapter(get_name, compiled=True)
+def dict_adapter(names):
     """Adapter returns name-values dict instead of pure tuple
     from iteration scheme.
     """
-    return dict(zip(names, values))
+    keys = {'k{}'.format(i): name for i, name in enumerate(names)}
+    items = ', '.join('k{0}: values[{0}]'.format(i) for i in range(len(keys)))
+    namespace = {}
+    exec('def make(values):\n    return {{{}}}'.format(items),  # pylint: disable=exec-used
+         keys, namespace)
 
+    return namespace['make']
 
-@adapter(get_name)
-def namedtuple_adapter(values, names):
+
+@adapter(get_name, compiled=True)
+def namedtuple_adapter(names):
     """Adapter returns namedtuple object instead of pure tuple
     from iteration scheme.
     """
     named = namedtuple('named', ' '.join(names))
-    return named(*values)
+    return partial(tuple.__new__, named)
+
+
+def _slots_record(names):
+    """Creates record class with __slots__ and generated __init__
+    which assigns attributes without any loops.
+    """
+    for name in names:
+        if not name.isidentifier() or keyword.iskeyword(name):
+            raise ValueError("{!r} is not a valid attribute name".format(name))
+
+    arguments = ', '.join(names)
+    assignments = ''.join('\n    self.{0} = {0}'.format(name)
+                          for name in names) or '\n    pass'
+    namespace = {}
+    exec('def __init__(self, {}):{}'.format(arguments, assignments),  # pylint: disable=exec-used
+         namespace)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in names)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):  # pylint: disable=unidiomatic-typecheck
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return 'record({})'.format(', '.join(
+            '{}={!r}'.format(name, value) for name, value in zip(names, self)))
+
+    return type('record', (), {'__slots__': tuple(names),
+                               '__init__': namespace['__init__'],
+                               '__iter__': __iter__,
+                               '__eq__': __eq__,
+                               '__hash__': None,
+                               '__repr__': __repr__})
+
+
+@adapter(get_name, compiled=True)
+def slots_adapter(names):
+    """Adapter returns instances of record class with ``__slots__``
+    named after parameters. Cheaper in memory than dict and
+    supports attribute access like namedtuple.
+    """
+    record = _slots_record(names)
+
+    def make(values):
+        return record(*values)
+
+    return make
+
+
+@adapter(get_name_and_dtype, compiled=True)
+def row_adapter(names_and_dtypes):
+    """Adapter returns numpy structured row with a field for every
+    parameter. The same row is overwritten for every point, so copy
+    it (``row.copy()``) to keep values past the next point. Works for
+    scalar valued parameters only.
+    """
+    rows = numpy.zeros(1, dtype=list(names_and_dtypes))
+
+    def make(values):
+        rows[0] = values
+        return rows[0]
+
+    return make
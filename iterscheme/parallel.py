@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+    parallel.py
+    ~~~~~~~~~~~
+
+    Evaluation of iteration schemes on a pool of worker processes.
+"""
+
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .journal import Journal
+from .monitor import Monitor
+
+
+# Per-process evaluation state, set up once by pool initializer
+_WORKER = None
+
+
+def _worker_state(ischeme, func, adapter):
+    adapt = adapter.compile(ischeme) if adapter is not None else None
+    return ischeme, func, adapt
+
+
+def _init_worker(ischeme, func, adapter):
+    global _WORKER  # pylint: disable=global-statement
+    _WORKER = _worker_state(ischeme, func, adapter)
+
+
+def _evaluate_range(start, stop, worker=None):
+    """Evaluates range of points with :arg:`worker` state (serial
+    runs) or with the state of pool worker process.
+    """
+    ischeme, func, adapt = worker or _WORKER
+    points = ischeme.compile().iter_range(start, stop)
+    if adapt is None:
+        return start, [func(values) for values in points]
+
+    return start, [func(adapt(values)) for values in points]
+
+
+def _evaluate_range_timed(start, stop, worker=None):
+    started = time.perf_counter()
+    start, results = _evaluate_range(start, stop, worker)
+    return start, results, time.perf_counter() - started
+
+
+def _evaluate_range_monitored(start, stop, slowest, worker=None):
+    ischeme, func, adapt = worker or _WORKER
+    monitor = Monitor(slowest=slowest)
+    points = ischeme.compile().iter_range(start, stop)
+    return start, monitor.evaluate(points, start, func, adapt), monitor.stats()
+
+
+def _chunks(spans, chunksize):
+    for span_start, span_stop in spans:
+        for start in range(span_start, span_stop, chunksize):
+            yield start, min(start + chunksize, span_stop)
+
+
+def _unpack(start, results, with_index, journal):
+    """Yields chunk results. Point is marked in journal only after
+    consumer has processed its result.
+    """
+    for index, result in enumerate(results, start):
+        yield (index, result) if with_index else result
+        if journal is not None:
+            journal.add(index)
+
+
+def _unpack_monitored(start, results, stats, with_index, journal, monitor):
+    """:func:`_unpack` which also records worker statistics, time
+    spent by consumer on every result and progress.
+    """
+    monitor.merge(stats)
+    clock = time.perf_counter_ns
+    for index, result in enumerate(results, start):
+        handled = clock()
+        yield (index, result) if with_index else result
+        monitor.record('handle', clock() - handled)
+        if journal is not None:
+            journal.add(index)
+        monitor.advance()
+
+
+def _completed(pending, ordered):
+    """Waits for the oldest chunk when order matters, otherwise
+    for any chunk, and yields finished (start, results) pairs.
+    """
+    if ordered:
+        yield pending.popleft().result()
+        return
+
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+        yield future.result()
+
+
+def parallel_map(ischeme, func, workers=None, chunksize=None, ordered=True,
+                 adapter=None, with_index=False, journal=None, monitor=None):
+    """Evaluates :arg:`func` over every point of :arg:`ischeme` and
+    yields results as soon as they are available.
+
+    Work is sent to :arg:`workers` processes as ranges of flat indices
+    of :arg:`chunksize` points, scheme itself is transferred once per
+    worker. With :arg:`ordered` results follow scheme order, otherwise
+    chunks are yielded as they complete. :arg:`adapter` (e.g.
+    :func:`iterscheme.dict_adapter`) is applied to points on the worker
+    side. With :arg:`with_index` every result is yielded as
+    (flat_index, result) pair. ``workers=1`` evaluates in the calling
+    process without a pool.
+
+    :arg:`journal` (:class:`iterscheme.Journal` or path to journal file)
+    makes the run resumable: points already recorded in the journal are
+    skipped. A point is recorded when the consumer asks for the result
+    following it, so a result taken right before a crash or ``break`` is
+    evaluated again on resume rather than lost.
+
+    :arg:`monitor` (:class:`iterscheme.Monitor`) collects timings of
+    every stage, throughput and progress of the run.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be positive")
+
+    owns_journal = journal is not None and not isinstance(journal, Journal)
+    if owns_journal:
+        journal = Journal(journal, ischeme)
+    try:
+        yield from _map_spans(ischeme, func, workers, chunksize, ordered,
+                              adapter, with_index, journal, monitor)
+    finally:
+        if monitor is not None:
+            monitor.finish()
+        if owns_journal:
+            journal.close()
+        elif journal is not None:
+            journal.flush()
+
+
+def _map_spans(ischeme, func, workers, chunksize, ordered,
+               adapter, with_index, journal, monitor):
+    if journal is not None:
+        spans = journal.missing()
+    else:
+        spans = [(0, len(ischeme))]
+    total = sum(stop - start for start, stop in spans)
+    if monitor is not None:
+        monitor.start(ischeme, total)
+        evaluate, unpack = _evaluate_range_monitored, _unpack_monitored
+        evaluate_args = (monitor.slowest,)
+        unpack_args = (with_index, journal, monitor)
+    else:
+        evaluate, unpack = _evaluate_range, _unpack
+        evaluate_args = ()
+        unpack_args = (with_index, journal)
+    if chunksize is None:
+        chunksize = max(1, -(-total // (workers * 4)))
+    chunks = _chunks(spans, chunksize)
+
+    if workers == 1:
+        worker = _worker_state(ischeme, func, adapter)
+        for start, stop in chunks:
+            yield from unpack(*evaluate(start, stop, *evaluate_args, worker=worker),
+                              *unpack_args)
+        return
+
+    max_pending = workers * 2
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(ischeme, func, adapter)) as pool:
+        pending = deque()
+        try:
+            for start, stop in chunks:
+                pending.append(pool.submit(evaluate, start, stop, *evaluate_args))
+                if len(pending) >= max_pending:
+                    for chunk in _completed(pending, ordered):
+                        yield from unpack(*chunk, *unpack_args)
+
+            while pending:
+                for chunk in _completed(pending, ordered):
+                    yield from unpack(*chunk, *unpack_args)
+        finally:
+            for future in pending:
+                future.cancel()
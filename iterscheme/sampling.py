@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+    sampling.py
+    ~~~~~~~~~~~
+
+    Random and low-discrepancy subsets of iteration scheme points
+    chosen directly in index or level space.
+"""
+
+
+import numpy
+
+
+METHODS = ('uniform', 'stratified', 'sobol', 'latin_hypercube')
+
+# Primitive polynomials (degree, coefficients) and initial direction
+# numbers of Sobol sequence for dimensions 2-21 by Joe and Kuo
+# (new-joe-kuo-6.21201), the first dimension is van der Corput sequence
+_SOBOL = [(1, 0, (1,)),
+          (2, 1, (1, 3)),
+          (3, 1, (1, 3, 1)),
+          (3, 2, (1, 1, 1)),
+          (4, 1, (1, 1, 3, 3)),
+          (4, 4, (1, 3, 5, 13)),
+          (5, 2, (1, 1, 5, 5, 17)),
+          (5, 4, (1, 1, 5, 5, 5)),
+          (5, 7, (1, 1, 7, 11, 19)),
+          (5, 11, (1, 1, 5, 1, 1)),
+          (5, 13, (1, 1, 1, 3, 11)),
+          (5, 14, (1, 3, 5, 5, 31)),
+          (6, 1, (1, 3, 3, 9, 7, 49)),
+          (6, 13, (1, 1, 1, 15, 21, 21)),
+          (6, 16, (1, 3, 1, 13, 27, 49)),
+          (6, 19, (1, 1, 1, 15, 7, 5)),
+          (6, 22, (1, 3, 1, 15, 13, 25)),
+          (6, 25, (1, 1, 5, 5, 19, 61)),
+          (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+          (7, 4, (1, 3, 7, 13, 13, 15, 69))]
+
+_BITS = 32
+
+
+def _directions(dimension):
+    """Direction integers V_1..V_32 of Sobol sequence dimension.
+    """
+    if dimension == 0:
+        return [1 << (_BITS - i) for i in range(1, _BITS + 1)]
+
+    degree, coefficients, initial = _SOBOL[dimension - 1]
+    directions = [m << (_BITS - i) for i, m in enumerate(initial, 1)]
+    for i in range(degree, _BITS):
+        value = directions[i - degree] ^ (directions[i - degree] >> degree)
+        for k in range(1, degree):
+            if (coefficients >> (degree - 1 - k)) & 1:
+                value ^= directions[i - k]
+        directions.append(value)
+
+    return directions
+
+
+def sobol(count, dimensions, rng=None):
+    """First :arg:`count` points of Sobol sequence in [0, 1)^dimensions,
+    array of shape (count, dimensions). With :arg:`rng` every dimension
+    is scrambled by a random digital shift, which keeps
+    low-discrepancy of the sequence.
+    """
+    if dimensions > len(_SOBOL) + 1:
+        raise ValueError("sobol sampling supports at most {} levels".format(
+            len(_SOBOL) + 1))
+
+    n = numpy.arange(count, dtype=numpy.uint64)
+    gray = n ^ (n >> numpy.uint64(1))
+    points = numpy.zeros((count, dimensions), dtype=numpy.uint64)
+    for dimension in range(dimensions):
+        column = points[:, dimension]
+        for bit, direction in enumerate(_directions(dimension)):
+            mask = (gray >> numpy.uint64(bit)) & numpy.uint64(1)
+            column ^= mask * numpy.uint64(direction)
+        if rng is not None:
+            column ^= numpy.uint64(rng.integers(0, 2**_BITS))
+
+    return points / float(2**_BITS)
+
+
+def _unique(indices):
+    """Drops repeated indices keeping order of the first occurrences.
+    """
+    _, first = numpy.unique(indices, return_index=True)
+    return indices[numpy.sort(first)]
+
+
+def _level_indices(plan, unit):
+    """Canonical flat indices of points with positions
+    ``floor(unit * size)`` on levels of :arg:`plan` which have more
+    than one position (columns of :arg:`unit`).
+    """
+    indices = numpy.zeros(len(unit), dtype=numpy.int64)
+    column = 0
+    for size, stride in zip(plan.sizes, plan.strides):
+        if size > 1:
+            digits = numpy.minimum((unit[:, column] * size).astype(numpy.int64), size - 1)
+            indices += digits * stride
+            column += 1
+
+    return indices
+
+
+def sample_indices(plan, count, method='uniform', seed=0, shard=None):
+    """Flat indices of :arg:`count` distinct points of :arg:`plan`.
+
+    ``uniform`` takes indices at random without replacement,
+    ``stratified`` takes one random index from each of :arg:`count`
+    equal ranges of indices. ``sobol`` and ``latin_hypercube`` choose
+    positions on every level independently, so they spread points
+    over every parameter; repeated points (likely when levels are
+    small) are dropped, so fewer than :arg:`count` indices can be
+    returned, as well as for constrained schemes, where points removed
+    by constraints are dropped.
+
+    Selection is determined by :arg:`seed`. :arg:`shard` (i, n) keeps
+    every n-th index starting from i-th, so workers which use the same
+    seed get disjoint parts of the same sample.
+    """
+    if method not in METHODS:
+        raise ValueError("unknown sampling method {!r}, use one of {}".format(
+            method, ', '.join(METHODS)))
+    length = plan.length
+    if length is None:
+        raise TypeError("scheme with stream can't be sampled")
+    rng = numpy.random.default_rng(seed)
+
+    if method in ('uniform', 'stratified'):
+        if count > length:
+            raise ValueError("can't take {} points of {}".format(count, length))
+        if method == 'uniform':
+            indices = numpy.sort(rng.choice(length, count, replace=False))
+        else:
+            bounds = numpy.array([i * length // count for i in range(count + 1)],
+                                 dtype=numpy.int64)
+            widths = numpy.diff(bounds)
+            indices = bounds[:-1] + (rng.random(count) * widths).astype(numpy.int64)
+    else:
+        dimensions = sum(1 for size in plan.sizes if size > 1)
+        if method == 'sobol':
+            unit = sobol(count, dimensions, rng)
+        else:
+            unit = numpy.empty((count, dimensions))
+            for column in range(dimensions):
+                unit[:, column] = (rng.permutation(count) + rng.random(count)) / count
+        indices = plan.logical(_unique(_level_indices(plan, unit)))
+        indices = indices[indices >= 0]
+
+    if shard is not None:
+        position, shards = shard
+        indices = indices[position::shards]
+
+    return indices
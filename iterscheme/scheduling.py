@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+    scheduling.py
+    ~~~~~~~~~~~~~
+
+    Cost-model-aware scheduling of iteration scheme points
+    on a pool of worker processes.
+"""
+
+
+import heapq
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy
+from .parallel import _init_worker, _worker_state, _evaluate_range_timed, \
+                      _completed
+
+
+def predict_makespan(costs, workers):
+    """Makespan of list scheduling of :arg:`costs` in given order
+    on :arg:`workers` identical workers, every worker takes the next
+    task as soon as it is free.
+    """
+    loads = [0.0] * workers
+    for cost in costs:
+        heapq.heappush(loads, heapq.heappop(loads) + cost)
+
+    return max(loads)
+
+
+class CostScheduler():
+    """:class:`iterscheme.CostScheduler` evaluates points of
+    :arg:`ischeme` on :arg:`workers` processes with work packed and
+    ordered by estimated cost.
+
+    Cost of a point is either given by :arg:`cost` callable over the
+    point (adapted with :arg:`adapter`, when given) or by :arg:`costs`
+    dict, which maps parameter names to callables over parameter
+    values, cost of a point is then the product of its parameter
+    factors (parameters which are not mentioned have factor 1). The
+    second form is computed per level, not per point, so it is cheap
+    for huge schemes.
+
+    Flat index space is cut into chunks of roughly equal estimated
+    cost, about :arg:`chunks_per_worker` per worker. Unordered runs
+    send them longest first, ordered and serial runs in scheme order,
+    so that finished chunks are not buffered behind the first one. At
+    most two chunks per worker are in flight and workers take the next
+    chunk when they are free, so mistakes of the model are smoothed by
+    dynamic balancing. After the run :meth:`report` compares predicted
+    and actual makespan.
+    """
+    def __init__(self, ischeme, workers=None, cost=None, costs=None,
+                 adapter=None, chunks_per_worker=8):
+        if cost is not None and costs is not None:
+            raise ValueError("pass either cost or costs, not both")
+
+        self._ischeme = ischeme
+        self._plan = ischeme.compile()
+        self._workers = workers or os.cpu_count() or 1
+        self._cost = cost
+        self._adapter = adapter
+        self._adapt = None
+        if adapter is not None:
+            self._adapt = adapter.compile(ischeme)
+        self._factors = None
+        if cost is None:
+            self._factors = self._level_factors(costs or {})
+
+        self.chunks = self._pack(self._workers * chunks_per_worker)
+        self._sent = self.chunks
+        self._timings = {}
+        self._wall = None
+
+    def _level_factors(self, costs):
+        """Per-level arrays of cost factors and their sums.
+        """
+        names = iter(self._ischeme.column_names())
+        factors = []
+        for level, size in zip(self._plan.levels, self._plan.sizes):
+            level_factors = numpy.ones(size)
+            for var in level:
+                name = next(names)
+                if name in costs:
+                    level_factors *= [costs[name](var[d]) for d in range(size)]
+            factors.append(level_factors)
+
+        return factors, [f.sum() for f in factors]
+
+    def range_cost(self, start, stop):
+        """Estimated cost of points with flat indices in [start, stop).
+        """
+        if self._factors is None:
+            points = self._plan.iter_range(start, stop)
+            if self._adapt is not None:
+                points = map(self._adapt, points)
+            return float(sum(map(self._cost, points)))
+
+        factors, sums = self._factors
+        total = 0.0
+        for prefix, depth, first, last in self._plan.spans(start, stop):
+            span = 1.0
+            for level_factors, digit in zip(factors, prefix):
+                span *= level_factors[digit]
+            if depth < len(factors):
+                span *= factors[depth][first:last].sum()
+            for level_sum in sums[depth + 1:]:
+                span *= level_sum
+            total += span
+
+        return total
+
+    def _pack(self, target_chunks):
+        """Cuts index space into fine pieces and merges neighbouring
+        pieces into chunks of roughly total/target_chunks cost. Returns
+        (start, stop, cost) chunks, most expensive first.
+        """
+        length = len(self._ischeme)
+        if length == 0:
+            return []
+
+        pieces = min(length, target_chunks * 4)
+        bounds = sorted(set(i * length // pieces for i in range(pieces + 1)))
+        fine = [(start, stop, self.range_cost(start, stop))
+                for start, stop in zip(bounds[:-1], bounds[1:])]
+
+        target = sum(c for _, _, c in fine) / target_chunks
+        if target <= 0:
+            return fine
+
+        chunks = []
+        for start, stop, cost in fine:
+            if chunks and chunks[-1][2] + cost <= target:
+                chunk_start, _, chunk_cost = chunks[-1]
+                chunks[-1] = (chunk_start, stop, chunk_cost + cost)
+            else:
+                chunks.append((start, stop, cost))
+
+        chunks.sort(key=lambda chunk: chunk[2], reverse=True)
+        return chunks
+
+    def predicted_makespan(self):
+        """Predicted makespan in cost units for chunks sent in the
+        order of the last run (longest first before any run).
+        """
+        return predict_makespan([c for _, _, c in self._sent], self._workers)
+
+    def map(self, func, ordered=True, with_index=False):
+        """Evaluates :arg:`func` over every point like
+        :meth:`iterscheme.IterationScheme.map`. Without :arg:`ordered`
+        results are yielded as chunks complete.
+        """
+        self._timings = {}
+        started = time.perf_counter()
+        try:
+            for start, results in self._run(func, ordered):
+                if with_index:
+                    yield from enumerate(results, start)
+                else:
+                    yield from results
+        finally:
+            self._wall = time.perf_counter() - started
+
+    def _run(self, func, ordered):
+        self._sent = self.chunks
+        if ordered or self._workers == 1:
+            self._sent = sorted(self.chunks)
+
+        if self._workers == 1:
+            worker = _worker_state(self._ischeme, func, self._adapter)
+            for start, stop, _ in self._sent:
+                yield self._record(*_evaluate_range_timed(start, stop, worker))
+            return
+
+        max_pending = self._workers * 2
+        with ProcessPoolExecutor(self._workers, initializer=_init_worker,
+                                 initargs=(self._ischeme, func, self._adapter)) as pool:
+            pending = deque()
+            try:
+                for start, stop, _ in self._sent:
+                    pending.append(pool.submit(_evaluate_range_timed, start, stop))
+                    if len(pending) >= max_pending:
+                        for chunk in _completed(pending, ordered):
+                            yield self._record(*chunk)
+                while pending:
+                    for chunk in _completed(pending, ordered):
+                        yield self._record(*chunk)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _record(self, start, results, seconds):
+        """Records chunk timing.
+        """
+        self._timings[start] = seconds
+        return start, results
+
+    def report(self):
+        """Snapshot dict which compares the cost model with the last
+        run. Cost units are converted into seconds with the scale fitted
+        on measured chunk times, so ``predicted_makespan`` and
+        ``actual_makespan`` are both in seconds.
+        """
+        measured = [(cost, self._timings[start])
+                    for start, _, cost in self.chunks if start in self._timings]
+        total_cost = sum(cost for cost, _ in measured)
+        total_seconds = sum(seconds for _, seconds in measured)
+        scale = total_seconds / total_cost if total_cost else 0.0
+
+        return {'workers': self._workers,
+                'chunks': len(self.chunks),
+                'completed_chunks': len(measured),
+                'seconds_per_cost': scale,
+                'predicted_makespan': self.predicted_makespan() * scale,
+                'actual_makespan': self._wall,
+                'busy_seconds': total_seconds,
+                'chunk_costs': [cost for cost, _ in measured],
+                'chunk_seconds': [seconds for _, seconds in measured]}
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+    shared.py
+    ~~~~~~~~~
+
+    Transfer of numpy parameter arrays to worker processes
+    through shared memory.
+"""
+
+
+import sys
+import weakref
+from multiprocessing import shared_memory
+import numpy
+try:
+    from numpy.lib.array_utils import byte_bounds
+except ImportError:
+    from numpy import byte_bounds
+
+
+# Blocks created or attached by this process by name. Attached blocks
+# live as long as the process, forked workers reuse blocks of parent
+_ATTACHED = {}
+
+
+def _attach_block(name):
+    if name not in _ATTACHED:
+        if sys.version_info >= (3, 13):
+            # Only the creating process is responsible for the block
+            _ATTACHED[name] = shared_memory.SharedMemory(name, track=False)  # pylint: disable=unexpected-keyword-arg
+        else:
+            # Workers share resource tracker of the parent, so
+            # registration of attached block changes nothing
+            _ATTACHED[name] = shared_memory.SharedMemory(name)
+    return _ATTACHED[name]
+
+
+def _view(block, offset, shape, dtype, strides):
+    array = numpy.ndarray(shape, dtype=dtype, buffer=block.buf,
+                          offset=offset, strides=strides).view(SharedArray)
+    array._block = block  # pylint: disable=protected-access
+    return array
+
+
+def _attach(name, offset, shape, dtype, strides):
+    """Zero-copy array over block :arg:`name`, used by pickle.
+    """
+    array = _view(_attach_block(name), offset, shape, dtype, strides)
+    array.flags.writeable = False
+    return array
+
+
+class SharedArray(numpy.ndarray):
+    """Numpy array which lives in :class:`multiprocessing.shared_memory.SharedMemory`
+    block. Pickle transfers only name of the block and layout of the
+    array, so unpickled array is a view of the same memory. Arrays
+    derived from it (e.g. results of arithmetic) which are not inside
+    the block are pickled with their data as usual.
+    """
+    def __array_finalize__(self, obj):
+        self._block = getattr(obj, '_block', None)  # pylint: disable=attribute-defined-outside-init
+        self._owner = getattr(obj, '_owner', None)  # pylint: disable=attribute-defined-outside-init
+
+    def _offset(self):
+        if self._block is None or self.size == 0:
+            return None
+        if self._block.buf is None or getattr(self._block, '_released', False):
+            raise ValueError("shared memory block {} is released, SharedScheme must "
+                             "stay open while its scheme is used".format(self._block.name))
+        start = numpy.frombuffer(self._block.buf, dtype=numpy.uint8).ctypes.data
+        low, high = byte_bounds(self)
+        if low < start or high > start + self._block.size:
+            return None
+        return self.ctypes.data - start
+
+    def __reduce__(self):
+        offset = self._offset()
+        if offset is None:
+            return numpy.asarray(self).__reduce__()
+
+        return _attach, (self._block.name, offset, self.shape,
+                         self.dtype, self.strides)
+
+
+def _release(blocks):
+    for block in blocks:
+        _ATTACHED.pop(block.name, None)
+        block._released = True  # pylint: disable=protected-access
+        try:
+            block.close()
+        except BufferError:
+            # Arrays over the block are still alive, memory is freed
+            # when they are gone, the name is removed right away
+            pass
+        block.unlink()
+    del blocks[:]
+
+
+class SharedScheme():
+    """:class:`iterscheme.SharedScheme` places every numpy array of
+    :arg:`ischeme` with at least :arg:`min_bytes` bytes (parameter
+    values and array constants) into its own shared memory block and
+    builds :attr:`scheme` over views of these blocks. When
+    :attr:`scheme` (or its sub-scheme, shard, slice of parameter) is
+    pickled to another process, arrays are transferred as block names
+    and the other process gets read-only views with the same parameter
+    names, no data is copied. Smaller arrays and other values are
+    pickled as usual; scheme without large arrays is used as is.
+    Shared arrays keep their owner alive, so :attr:`scheme` can be
+    used after the owner itself is dropped::
+
+        with SharedScheme(scheme) as shared_scheme:
+            results = list(shared_scheme.map(func, workers=8))
+
+    Blocks are unlinked by :meth:`close` (on exit of ``with`` block),
+    when the object is garbage collected or at interpreter exit, so
+    the scheme must not be used by workers after that.
+    """
+    def __init__(self, ischeme, min_bytes=1 << 20):
+        self._min_bytes = min_bytes
+        self._blocks = []
+        self._finalizer = weakref.finalize(self, _release, self._blocks)
+
+        nested_variables = ischeme._nested_variables  # pylint: disable=protected-access
+        shared = [self._share_level(level) for level in nested_variables]
+        if self._blocks:
+            # Pruning of unpickled scheme is kept along with constraints
+            constraints, pruning = ischeme._constraints, ischeme._pruning  # pylint: disable=protected-access
+            self.scheme = type(ischeme)(shared, constraints, pruning)
+        else:
+            self.scheme = ischeme
+
+    def _share_level(self, level):
+        variables = [self._share(var) for var in level]
+        return tuple(variables) if isinstance(level, tuple) else variables
+
+    def _share(self, var):
+        if not isinstance(var, numpy.ndarray) or var.nbytes < self._min_bytes \
+                or var.dtype.hasobject:
+            return var
+
+        block = shared_memory.SharedMemory(create=True, size=max(var.nbytes, 1))
+        self._blocks.append(block)
+        _ATTACHED[block.name] = block
+        array = _view(block, 0, var.shape, var.dtype, None)
+        array._owner = self  # pylint: disable=protected-access
+        array[...] = var
+        array.flags.writeable = False
+        if hasattr(var, 'parameter_name'):
+            from .named_parameter import named_parameter  # pylint: disable=import-outside-toplevel
+            return named_parameter(var.parameter_name, array)
+        return array
+
+    @property
+    def shared_bytes(self):
+        """Total size of shared memory blocks.
+        """
+        return sum(block.size for block in self._blocks)
+
+    def close(self):
+        """Releases and unlinks shared memory blocks.
+        """
+        self._finalizer()
+
+    def __enter__(self):
+        return self.scheme
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+    sink.py
+    ~~~~~~~
+
+    Streaming storage of sweep results in chunked columnar files.
+"""
+
+
+import json
+import os
+import queue
+import threading
+from collections.abc import Mapping
+import numpy
+from .iterscheme import _to_column
+
+
+def _write_json(path, content):
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf8') as output:
+        json.dump(content, output)
+    os.replace(temporary, path)
+
+
+class ColumnSink():
+    """:class:`iterscheme.ColumnSink` collects (point, result) pairs
+    into column chunks of :arg:`chunk_size` rows which are written to
+    :arg:`directory` by a background thread as ``.npy`` files, one
+    file per column per chunk, along with ``index.json``.
+
+    Point can be a mapping (e.g. from :func:`iterscheme.dict_adapter`)
+    or a plain tuple, which gives columns ``f0``, ``f1``... Result
+    mapping gives a column per key, other results go to column
+    ``result``. Columns are fixed by the first row.
+
+    Sweep thread only converts full chunks into arrays, writing happens
+    in background. It waits for the writer only when chunks which are
+    not written yet take more than :arg:`max_buffered_bytes`.
+    """
+    def __init__(self, directory, chunk_size=65536, max_buffered_bytes=256 * 2**20):
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._chunk_size = chunk_size
+        self._max_buffered = max_buffered_bytes
+
+        self._names = None
+        self._rows = None
+        self._index = {'columns': [], 'chunks': []}
+
+        self._buffered = 0
+        self._room = threading.Condition()
+        self._queue = queue.Queue()
+        self._error = None
+        self._writer = threading.Thread(target=self._write_chunks, daemon=True)
+        self._writer.start()
+
+    def _row(self, point, result):
+        if isinstance(point, Mapping):
+            items = list(point.items())
+        else:
+            items = [('f{}'.format(i), v) for i, v in enumerate(point)]
+        if isinstance(result, Mapping):
+            items.extend(result.items())
+        else:
+            items.append(('result', result))
+        return items
+
+    def add(self, point, result):
+        """Adds single (point, result) pair.
+        """
+        self._check_writer()
+        items = self._row(point, result)
+        if self._names is None:
+            self._names = [name for name, _ in items]
+            if len(set(self._names)) != len(self._names):
+                raise ValueError("duplicate column names {}".format(self._names))
+            self._rows = [[] for _ in self._names]
+        elif len(items) != len(self._names) or \
+                any(name != expected for (name, _), expected in zip(items, self._names)):
+            raise ValueError("row columns differ from {}".format(self._names))
+
+        for column, (_, value) in zip(self._rows, items):
+            column.append(value)
+        if len(self._rows[0]) >= self._chunk_size:
+            self.flush()
+
+    def add_many(self, pairs):
+        """Adds all (point, result) pairs from iterable.
+        """
+        for point, result in pairs:
+            self.add(point, result)
+
+    def flush(self):
+        """Hands buffered rows over to the writer thread.
+        """
+        if not self._rows or not self._rows[0]:
+            return
+
+        columns = [_to_column(values) for values in self._rows]
+        self._rows = [[] for _ in self._names]
+        size = sum(column.nbytes for column in columns)
+        with self._room:
+            while self._buffered and self._buffered + size > self._max_buffered \
+                    and self._error is None:
+                self._room.wait()
+            self._buffered += size
+        self._queue.put((columns, size))
+
+    def _write_chunks(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            columns, size = item
+            try:
+                if self._error is None:
+                    self._write(columns)
+            except Exception as error:  # pylint: disable=broad-except
+                self._error = error
+            finally:
+                with self._room:
+                    self._buffered -= size
+                    self._room.notify_all()
+
+    def _write(self, columns):
+        chunk = len(self._index['chunks'])
+        if not self._index['columns']:
+            self._index['columns'] = [{'name': name, 'dtype': column.dtype.str}
+                                      for name, column in zip(self._names, columns)]
+        for i, column in enumerate(columns):
+            path = os.path.join(self._directory, 'c{}.{:06d}.npy'.format(i, chunk))
+            numpy.save(path, column, allow_pickle=column.dtype == object)
+        self._index['chunks'].append({'rows': len(columns[0]),
+                                      'dtypes': [column.dtype.str for column in columns]})
+        _write_json(os.path.join(self._directory, 'index.json'), self._index)
+
+    def _check_writer(self):
+        if self._error is not None:
+            raise RuntimeError("background writer failed") from self._error
+
+    def close(self):
+        """Writes remaining rows and waits for the writer thread.
+        """
+        if self._writer.is_alive():
+            self.flush()
+            self._queue.put(None)
+            self._writer.join()
+        self._check_writer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ColumnReader():
+    """:class:`iterscheme.ColumnReader` reads results written by
+    :class:`iterscheme.ColumnSink`. Columns are loaded only when
+    requested, chunks of numeric columns are memory mapped.
+    """
+    def __init__(self, directory):
+        self._directory = directory
+        with open(os.path.join(directory, 'index.json'), 'r', encoding='utf8') as index:
+            self._index = json.load(index)
+        self._positions = {column['name']: i
+                           for i, column in enumerate(self._index['columns'])}
+
+    @property
+    def columns(self):
+        """Names of the columns.
+        """
+        return list(self._positions)
+
+    def __len__(self):
+        return sum(chunk['rows'] for chunk in self._index['chunks'])
+
+    def chunks(self, name):
+        """Yields chunks of column :arg:`name` one by one.
+        """
+        position = self._positions[name]
+        for chunk, description in enumerate(self._index['chunks']):
+            path = os.path.join(self._directory, 'c{}.{:06d}.npy'.format(position, chunk))
+            if description['dtypes'][position] == '|O':
+                yield numpy.load(path, allow_pickle=True)
+            else:
+                yield numpy.load(path, mmap_mode='r')
+
+    def __getitem__(self, name):
+        """Whole column :arg:`name` as a single array.
+        """
+        chunks = list(self.chunks(name))
+        if not chunks:
+            dtype = self._index['columns'][self._positions[name]]['dtype']
+            return numpy.empty(0, dtype=numpy.dtype(dtype))
+
+        return numpy.concatenate(chunks)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+    sources.py
+    ~~~~~~~~~~
+
+    Lazy sources of values for iteration scheme levels.
+"""
+
+
+import copy
+import numpy
+
+
+class LazySequence():
+    """Base class for sized sequences which compute values on demand
+    instead of keeping them in memory. Subclass implements
+    :meth:`_value` and, for vectorized access used by batch iteration,
+    may override :meth:`_values`.
+
+    Slices are lazy too, so splitting such level doesn't
+    materialize it.
+    """
+    def __init__(self, length):
+        self._indices = range(length)
+
+    def _value(self, index):
+        raise NotImplementedError
+
+    def _values(self, indices):
+        """Values for numpy array of underlying indices.
+        """
+        column = numpy.empty(len(indices), dtype=object)
+        for i, index in enumerate(indices):
+            column[i] = self._value(int(index))
+        return column
+
+    def describe(self):
+        """Tuple of parameters which fully define the sequence or
+        None, when values can only be obtained by computing them.
+        """
+        return None
+
+    def __copy__(self):
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __iter__(self):
+        return map(self._value, self._indices)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            view = copy.copy(self)
+            view._indices = self._indices[key]  # pylint: disable=protected-access
+            return view
+        if isinstance(key, numpy.ndarray):
+            indices = self._indices
+            return self._values(indices.start + key * indices.step)
+
+        return self._value(self._indices[key])
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__,
+                               ', '.join(repr(v) for v in self[:4]) +
+                               (', ...' if len(self) > 4 else ''))
+
+
+class Arithmetic(LazySequence):
+    """:arg:`count` values ``start + i*step``.
+    """
+    def __init__(self, start, step, count):
+        super().__init__(count)
+        self._start = start
+        self._step = step
+
+    def _value(self, index):
+        return self._start + index * self._step
+
+    def _values(self, indices):
+        return self._start + indices * self._step
+
+    def describe(self):
+        indices = self._indices
+        return ('arithmetic', self._start, self._step,
+                (indices.start, indices.stop, indices.step))
+
+
+class Geometric(LazySequence):
+    """:arg:`count` values ``start * ratio**i``.
+    """
+    def __init__(self, start, ratio, count):
+        super().__init__(count)
+        self._start = start
+        self._ratio = ratio
+
+    def _value(self, index):
+        return self._start * self._ratio ** index
+
+    def _values(self, indices):
+        return self._start * numpy.power(self._ratio, indices)
+
+    def describe(self):
+        indices = self._indices
+        return ('geometric', self._start, self._ratio,
+                (indices.start, indices.stop, indices.step))
+
+
+class OnDemand(LazySequence):
+    """:arg:`length` values computed as ``func(i)`` when requested,
+    e.g. read from disk.
+    """
+    def __init__(self, func, length):
+        super().__init__(length)
+        self._func = func
+
+    def _value(self, index):
+        return self._func(index)
+
+
+class Stream():
+    """Unsized source of values for the innermost level. Callable
+    :arg:`factory` is called to open new iterable for every
+    combination of outer values, so values never have to be kept
+    in memory. Scheme with stream has no length and no random access.
+    """
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __iter__(self):
+        return iter(self._factory())
+
+
+def is_lazy(variable):
+    """Checks whether values of variable are produced on demand.
+    """
+    return isinstance(variable, (range, LazySequence, Stream))
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+    spec.py
+    ~~~~~~~
+
+    Compact JSON-compatible description of iteration schemes.
+"""
+
+
+import numpy
+from .named_parameter import named_parameter
+from .sources import LazySequence, Arithmetic, Geometric
+
+
+def _plain(value):
+    """Converts numpy scalars and arrays into plain Python values.
+    """
+    if isinstance(value, numpy.generic):
+        return value.item()
+    if isinstance(value, numpy.ndarray):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+
+    return value
+
+
+def variable_spec(variable, constant=False):
+    """Describes single variable as JSON-compatible dict.
+    """
+    spec = {'name': getattr(variable, 'parameter_name', None)}
+    if constant:
+        spec.update(kind='value', value=_plain(variable))
+    elif isinstance(variable, numpy.ndarray):
+        spec.update(kind='array', dtype=variable.dtype.str,
+                    values=numpy.asarray(variable).tolist())
+    elif isinstance(variable, range):
+        spec.update(kind='range', start=variable.start,
+                    stop=variable.stop, step=variable.step)
+    elif isinstance(variable, LazySequence):
+        description = variable.describe()
+        if description is None:
+            raise ValueError("{!r} can't be described by spec".format(variable))
+        kind, start, factor, indices = description
+        spec.update(kind=kind, start=_plain(start), factor=_plain(factor),
+                    indices=list(indices))
+    elif isinstance(variable, str):
+        spec.update(kind='str', values=str(variable))
+    elif isinstance(variable, (list, tuple)):
+        kind = 'tuple' if isinstance(variable, tuple) else 'list'
+        spec.update(kind=kind, values=_plain(list(variable)))
+    else:
+        raise ValueError("{!r} can't be described by spec".format(variable))
+
+    return spec
+
+
+def variable_from_spec(spec):
+    """Restores variable described by :func:`variable_spec`.
+    """
+    kind = spec['kind']
+    if kind in ('value', 'str', 'list'):
+        variable = spec['value'] if kind == 'value' else spec['values']
+    elif kind == 'tuple':
+        variable = tuple(spec['values'])
+    elif kind == 'array':
+        variable = numpy.array(spec['values'], dtype=numpy.dtype(spec['dtype']))
+    elif kind == 'range':
+        variable = range(spec['start'], spec['stop'], spec['step'])
+    elif kind in ('arithmetic', 'geometric'):
+        sequence = Arithmetic if kind == 'arithmetic' else Geometric
+        variable = sequence(spec['start'], spec['factor'], 0)
+        variable._indices = range(*spec['indices'])  # pylint: disable=protected-access
+    else:
+        raise ValueError("unknown variable kind {!r}".format(kind))
+
+    if spec['name'] is not None:
+        variable = named_parameter(spec['name'], variable)
+
+    return variable
+
+
+def scheme_spec(nested_variables):
+    """Describes nested variables structure of a scheme.
+    """
+    constants, loops = nested_variables[0], nested_variables[1:]
+    return {'constants': [variable_spec(var, constant=True) for var in constants],
+            'levels': [[variable_spec(var) for var in level] for level in loops]}
+
+
+def nested_variables_from_spec(spec):
+    """Restores nested variables structure described
+    by :func:`scheme_spec`.
+    """
+    constants = tuple(variable_from_spec(var) for var in spec['constants'])
+    levels = [tuple(variable_from_spec(var) for var in level)
+              for level in spec['levels']]
+    return [constants or []] + levels
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+    staged.py
+    ~~~~~~~~~
+
+    Evaluation split into per-level stages with cached outputs
+    of outer stages.
+"""
+
+
+from collections import OrderedDict
+from .iterscheme import _key
+
+
+class Staged():
+    """:class:`iterscheme.Staged` is a function over points of a scheme
+    built from :arg:`stages`, one callable per level (constants level,
+    when present, is the first). The first stage is called with values
+    of its level, every next one with output of the previous stage
+    followed by values of its level::
+
+        func = scheme.staged(load_material, build_mesh, solve)
+        # solve(build_mesh(load_material(c), thickness), field)
+        results = list(scheme.map(func, workers=4))
+
+    Outputs of all stages but the last are cached by values of their
+    own and all outer levels, so a stage runs only when its values
+    change, not for every point. Every level keeps at most
+    :arg:`cache_size` outputs (least recently used are dropped), on a
+    process pool every worker has its own caches.
+    """
+    def __init__(self, widths, stages, cache_size=16):
+        if len(stages) != len(widths):
+            raise ValueError("scheme has {} levels, got {} stages".format(
+                len(widths), len(stages)))
+        if cache_size < 1:
+            raise ValueError("cache_size must be positive")
+
+        self._stages = tuple(stages)
+        self._cache_size = cache_size
+        bounds = []
+        stop = 0
+        for width in widths:
+            bounds.append((stop, stop + width))
+            stop += width
+        self._bounds = tuple(bounds)
+        self._caches = [OrderedDict() for _ in stages[:-1]]
+        self.calls = [0] * len(stages)
+
+    def __getstate__(self):
+        """Caches are per process, they are not pickled.
+        """
+        return self._stages, self._cache_size, self._bounds
+
+    def __setstate__(self, state):
+        self._stages, self._cache_size, self._bounds = state
+        self._caches = [OrderedDict() for _ in self._stages[:-1]]
+        self.calls = [0] * len(self._stages)
+
+    def _stage(self, level, output, values):
+        self.calls[level] += 1
+        start, stop = self._bounds[level]
+        if level == 0:
+            return self._stages[0](*values[start:stop])
+        return self._stages[level](output, *values[start:stop])
+
+    def __call__(self, values):
+        output = None
+        last = len(self._stages) - 1
+        for level, cache in enumerate(self._caches):
+            key = _key(values[:self._bounds[level][1]])
+            if key in cache:
+                cache.move_to_end(key)
+                output = cache[key]
+                continue
+
+            output = self._stage(level, output, values)
+            cache[key] = output
+            if len(cache) > self._cache_size:
+                cache.popitem(last=False)
+
+        return self._stage(last, output, values)
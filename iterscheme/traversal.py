@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+    traversal.py
+    ~~~~~~~~~~~~
+
+    Orders of traversal which change as few parameters as possible
+    between consecutive points.
+"""
+
+
+import numpy
+from .iterscheme import _iter_product
+
+
+ORDERS = ('lexicographic', 'serpentine', 'gray')
+
+
+def ordered_digits(positions, sizes, order):
+    """Per-level positions (list of numpy arrays, outermost level
+    first) of points which come at :arg:`positions` of traversal of
+    product of levels with :arg:`sizes` in :arg:`order`.
+
+    ``lexicographic`` is the usual order, the innermost level changes
+    fastest. ``serpentine`` runs every level backwards on its odd passes,
+    passes are counted over all levels above it, so every pass starts
+    where the previous one ended. ``gray`` is reflected mixed-radix Gray
+    code: level is reflected when sum of positions of all levels above
+    it is odd. Both orders give the same sequence, consecutive points
+    always differ on exactly one level, the innermost one most often.
+    """
+    if order not in ORDERS:
+        raise ValueError("unknown order {!r}, use one of {}".format(order, ', '.join(ORDERS)))
+
+    positions = numpy.asarray(positions, dtype=numpy.int64)
+    counters = []
+    stride = 1
+    for size in reversed(sizes):
+        counters.append((positions // stride) % size)
+        stride *= size
+    counters.reverse()
+    if order == 'lexicographic':
+        return counters
+
+    digits = [counters[0]]
+    parity = passes = counters[0]
+    for level in range(1, len(sizes)):
+        if order == 'serpentine':
+            reflect = passes % 2 == 1
+            passes = passes * sizes[level] + counters[level]
+        else:
+            reflect = parity % 2 == 1
+        digit = numpy.where(reflect, sizes[level] - 1 - counters[level], counters[level])
+        parity = parity + digit
+        digits.append(digit)
+
+    return digits
+
+
+def traversal_indices(plan, order):
+    """Flat indices of points of :arg:`plan` in the order of traversal.
+    """
+    total = 1
+    for size in plan.sizes:
+        total *= size
+    digits = ordered_digits(numpy.arange(total), plan.sizes, order)
+    canonical = numpy.zeros(total, dtype=numpy.int64)
+    for digit, stride in zip(digits, plan.strides):
+        canonical += digit * stride
+
+    indices = plan.logical(canonical)
+    return indices[indices >= 0]
+
+
+def iter_traversal(plan, order, with_index=False, chunk=4096):
+    """Yields points of :arg:`plan` (or (flat_index, point) pairs) in
+    the order of traversal. Outer positions are computed in chunks,
+    runs of the innermost level go through generated loops, forwards
+    or backwards.
+    """
+    if plan.length is None:
+        raise TypeError("scheme with stream has no traversal order")
+    if not plan.sizes:
+        yield from ([(0, ())] if with_index else [()])
+        return
+
+    inner_size = plan.sizes[-1]
+    outer_total = 1
+    for size in plan.sizes[:-1]:
+        outer_total *= size
+    widths = tuple(map(len, plan.levels))
+    components = plan.components
+    if components is not None:
+        backwards = tuple(reversed(components[-1]))
+    inner = numpy.arange(inner_size, dtype=numpy.int64)
+
+    for chunk_start in range(0, outer_total, chunk):
+        runs = numpy.arange(chunk_start, min(chunk_start + chunk, outer_total))
+        digits = ordered_digits(runs * inner_size, plan.sizes, order)
+        for run_digits in zip(*digits):
+            prefix = [int(d) for d in run_digits[:-1]]
+            reverse = inner_size > 1 and run_digits[-1] != 0
+            base = sum(d * stride for d, stride in zip(prefix, plan.strides))
+            canonical = base + (inner[::-1] if reverse else inner)
+            indices = plan.logical(canonical)
+            valid = indices >= 0
+            if not valid.any():
+                continue
+
+            if components is not None and valid.all():
+                fixed = tuple((component[d],) for component, d in zip(components, prefix))
+                points = _iter_product(widths, fixed + (backwards if reverse else components[-1],))
+            else:
+                points = (plan.point(prefix + [int(c - base)])
+                          for c, ok in zip(canonical, valid) if ok)
+                indices = indices[valid]
+
+            if with_index:
+                yield from zip(indices.tolist(), points)
+            else:
+                yield from points
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       Constants, NoConstants, named_parameter
+
+
+def _named_scheme(constants, *levels):
+    if constants:
+        element = Constants(*[named_parameter(name, value)
+                              for name, value in constants.items()])
+    else:
+        element = NoConstants()
+    for level in levels:
+        element = element >> IterationSchemeElement(
+            *[named_parameter(name, values) for name, values in level.items()])
+
+    return IterationScheme(element.nested_variables)
+
+
+@pytest.fixture
+def named_scheme():
+    """Builds scheme of named parameters from dicts of names and values:
+    constants first (empty dict for no constants), then a dict per
+    element, parameters of one dict are zipped::
+
+        named_scheme({'c': 0.5}, {'x': [1, 2]}, {'y': [3, 4], 'l': 'ab'})
+    """
+    return _named_scheme
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       NoConstants, dict_adapter, StopAxis, \
+                       SkipSubtree
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def diverge(point):
+    energy = point['t'] * point['field'] + point['k']
+    if energy > 45:
+        return StopAxis('field', -energy)
+    return energy
+
+
+def skip_odd_t(values):
+    _, t, field, k = values
+    if t == 2:
+        return SkipSubtree(1, 'skipped t=2')
+    if field == 20 and k == 0:
+        return SkipSubtree('field', field)
+    return t * field + k
+
+
+def expected_stop(ischeme):
+    results, stopped = [], set()
+    for index, (c, t, field, k) in enumerate(ischeme):
+        if t in stopped:
+            continue
+        energy = t * field + k
+        if energy > 45:
+            stopped.add(t)
+            results.append((index, -energy))
+        else:
+            results.append((index, energy))
+    return results
+
+
+def test_stop_axis_serial(named_scheme):
+    ischeme = named_scheme({'c': 1}, {'t': [1, 2, 3]}, {'field': [10, 20, 30, 40]}, {'k': [0, 1]})
+    run = ischeme.adaptive_map(diverge, workers=1, chunksize=5,
+                               adapter=dict_adapter, with_index=True)
+    results = list(run)
+
+    assert(results == expected_stop(ischeme))
+    assert(run.skipped == [(13, 16, 12), (19, 24, 18)])
+    assert(run.skipped_count() + len(results) == len(ischeme))
+
+
+def test_skip_subtree_serial(named_scheme):
+    ischeme = named_scheme({'c': 1}, {'t': [1, 2, 3]}, {'field': [10, 20, 30, 40]}, {'k': [0, 1]})
+    run = ischeme.adaptive_map(skip_odd_t, workers=1, with_index=True)
+    results = dict(run)
+
+    assert(results[8] == 'skipped t=2' and 9 not in results)
+    assert(results[2] == 20 and 3 not in results and results[4] == 30)
+    assert(sorted(list(results) + [i for start, stop, _ in run.skipped
+                                   for i in range(start, stop)]) == list(range(24)))
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_parallel_best_effort(ordered, named_scheme):
+    ischeme = named_scheme({'c': 1}, {'t': [1, 2, 3]}, {'field': [10, 20, 30, 40]}, {'k': [0, 1]})
+    run = ischeme.adaptive_map(diverge, workers=2, chunksize=3, ordered=ordered,
+                               adapter=dict_adapter, with_index=True)
+    results = dict(run)
+    skipped = {i for start, stop, _ in run.skipped for i in range(start, stop)}
+
+    for index, result in expected_stop(ischeme):
+        assert(results[index] == result)
+    assert(set(results) | skipped == set(range(len(ischeme))))
+    assert(not set(results) & skipped)
+    assert(run.skipped_count() + len(results) == len(ischeme))
+
+
+def test_constrained_stop_axis(named_scheme):
+    ischeme = named_scheme({'c': 1}, {'t': [1, 2, 3]}, {'field': [10, 20, 30, 40]},
+                           {'k': [0, 1]}).where(lambda t: t != 2)
+    results = list(ischeme.adaptive_map(diverge, workers=1, adapter=dict_adapter))
+
+    assert(results == [10, 11, 20, 21, 30, 31, 40, 41, 30, 31, -60])
+
+
+def test_unknown_axis():
+    ischeme = IS(NoConstants() >> ISE([1, 2]))
+    with pytest.raises(ValueError):
+        list(ischeme.adaptive_map(lambda x: StopAxis('w'), workers=1))
+
+
+def test_interleaved_serial_runs():
+    first = IS(NoConstants() >> ISE([1, 2, 3, 4])).adaptive_map(
+        lambda values: values[0], workers=1, chunksize=1)
+    second = IS(NoConstants() >> ISE([10, 20, 30, 40])).adaptive_map(
+        lambda values: -values[0], workers=1, chunksize=1)
+    a, b = iter(first), iter(second)
+
+    assert([next(a), next(b), next(a), next(b)] == [1, -10, 2, -20])
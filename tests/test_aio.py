@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+
+import asyncio
+import pytest
+from iterscheme import dict_adapter
+
+
+class Tracker():
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    async def evaluate(self, point):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            # Later points finish first
+            await asyncio.sleep(0.001 * (10 - point['x']))
+            return point['x'] + point['y']
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+
+
+def test_aiter(named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': [1, 2, 3, 4]}, {'y': [0, 10]})
+
+    async def collect():
+        return [p async for p in ischeme.aiter(adapter=dict_adapter)]
+
+    assert(asyncio.run(collect()) == list(dict_adapter(ischeme)))
+
+
+def test_amap_ordered(named_scheme):
+    tracker = Tracker()
+    ischeme = named_scheme({'c': 100}, {'x': [1, 2, 3, 4]}, {'y': [0, 10]})
+    results = asyncio.run(_await(ischeme.amap(tracker.evaluate, concurrency=3,
+                                              adapter=dict_adapter)))
+
+    assert(results == [x + y for _, x, y in ischeme])
+    assert(tracker.peak == 3)
+
+
+def test_amap_unordered(named_scheme):
+    tracker = Tracker()
+    ischeme = named_scheme({'c': 100}, {'x': [1, 2, 3, 4]}, {'y': [0, 10]})
+
+    async def collect():
+        return [r async for r in ischeme.amap(tracker.evaluate, concurrency=8,
+                                              ordered=False, with_index=True,
+                                              adapter=dict_adapter)]
+
+    results = asyncio.run(collect())
+    assert(sorted(results) == list(enumerate(x + y for _, x, y in ischeme)))
+    assert(results[0][0] > 0)
+
+
+def test_amap_cancellation(named_scheme):
+    tracker = Tracker()
+    ischeme = named_scheme({'c': 100}, {'x': [1, 2, 3, 4]}, {'y': [0, 10]})
+
+    async def run():
+        task = asyncio.ensure_future(_await(
+            ischeme.amap(tracker.evaluate, concurrency=4, adapter=dict_adapter)))
+        await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert(tracker.running == 0)
+    assert(tracker.cancelled > 0)
+
+
+def test_amap_exception(named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': [1, 2, 3, 4]}, {'y': [0, 10]})
+
+    async def fail(values):
+        if values[1] == 3:
+            raise RuntimeError("three")
+        await asyncio.sleep(0.01)
+        return values
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(_await(ischeme.amap(fail, concurrency=4)))
+
+
+async def _await(awaitable):
+    return await awaitable
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import dict_adapter, ResultCache
+import numpy
+
+
+calls = []
+
+
+def product_xy(point):
+    calls.append(point)
+    return point['x'] * point['y']
+
+
+def test_cache_overlapping_sweeps(tmp_path, named_scheme):
+    path = str(tmp_path / 'cache.sqlite')
+    del calls[:]
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2]}, {'y': numpy.array([1, 2])})
+    with ResultCache(path, version='1') as cache:
+        first = list(cache.evaluate(ischeme, product_xy, adapter=dict_adapter))
+        assert(first == [1, 2, 2, 4])
+        assert(cache.stats['misses'] == 4)
+
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': numpy.array([1, 2])})
+    with ResultCache(path, version='1') as cache:
+        second = list(cache.evaluate(ischeme, product_xy, adapter=dict_adapter))
+        assert(second == [1, 2, 2, 4, 3, 6])
+        assert(cache.stats['hits'] == 4)
+        assert(cache.stats['misses'] == 2)
+        assert(cache.stats['saved_seconds'] >= 0.0)
+
+    assert(len(calls) == 6)
+
+
+def test_cache_version(tmp_path, named_scheme):
+    path = str(tmp_path / 'cache.sqlite')
+    ischeme = named_scheme({'c': 0.5}, {'x': [1]}, {'y': numpy.array([1, 2])})
+    with ResultCache(path, version='1') as cache:
+        list(cache.evaluate(ischeme, product_xy, dict_adapter))
+    with ResultCache(path, version='2') as cache:
+        list(cache.evaluate(ischeme, product_xy, dict_adapter))
+        assert(cache.stats['hits'] == 0)
+        assert(len(cache) == 4)
+
+
+def test_cache_key_numpy_scalars():
+    cache = ResultCache(':memory:')
+
+    assert(cache.key([('x', numpy.int64(3)), ('y', 1.5)]) ==
+           cache.key([('y', 1.5), ('x', 3)]))
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.sqlite'), max_bytes=350)
+    for i in range(3):
+        cache.put(str(i), b'x' * 90)
+    cache.get('0')
+    cache.put('3', b'x' * 90)
+
+    assert(cache.stats['evictions'] == 1)
+    assert(cache.get('1') is None)
+    assert(cache.get('0') == b'x' * 90)
+    assert(cache.get('3') == b'x' * 90)
+    cache.close()
+
+
+def test_cache_commits_on_error(tmp_path, named_scheme):
+    def failing(point):
+        if point['x'] == 2:
+            raise RuntimeError('solver failed')
+        return product_xy(point)
+
+    path = str(tmp_path / 'cache.sqlite')
+    cache = ResultCache(path, version='1')
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2]}, {'y': numpy.array([1, 2])})
+    with pytest.raises(RuntimeError):
+        list(cache.evaluate(ischeme, failing, dict_adapter))
+
+    with ResultCache(path, version='1') as other:
+        assert(len(other) == 2)
+    cache.close()
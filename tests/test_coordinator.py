@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+
+import json
+import threading
+import time
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       Constants, NoConstants, named_parameter, dict_adapter, \
+                       Arithmetic, Geometric, OnDemand, DirectoryCoordinator, \
+                       DirectoryWorker
+import numpy
+
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def add(values):
+    return sum(v for v in values if not isinstance(v, str))
+
+
+def test_spec_roundtrip():
+    c = named_parameter('c', 100)
+    x = named_parameter('x', numpy.array([1, 2, 3], dtype=numpy.int32))
+    y = named_parameter('y', Arithmetic(0, 10, 20)[::-3])
+    ischeme = IS(Constants(c, 1) >> ISE(x, 'abc') >> ISE(y, range(7)))
+    spec = json.loads(json.dumps(ischeme.to_spec()))
+    restored = IS.from_spec(spec)
+
+    assert(list(restored) == list(ischeme))
+    assert(restored.column_names() == ischeme.column_names())
+    assert(restored.fingerprint() == ischeme.fingerprint())
+    assert(IS.from_spec(IS(NoConstants() >> ISE([1])).to_spec())[0] == (1,))
+
+
+@pytest.mark.parametrize('kind, values', [
+    ('array', numpy.array([1.5, 2.5], dtype=numpy.float32)),
+    ('range', range(2, 8, 3)),
+    ('arithmetic', Arithmetic(0.0, 0.5, 6)[1::2]),
+    ('geometric', Geometric(1.0, 10.0, 3)),
+    ('str', 'abc'),
+    ('list', [1, 2, 3]),
+    ('tuple', (1, 2, 3))])
+def test_spec_roundtrip_kinds(kind, values):
+    # range can't be subclassed, so it is never named
+    for var in [values] if kind == 'range' else [values, named_parameter('v', values)]:
+        ischeme = IS(Constants(named_parameter('c', 0.5), 7) >> ISE(var))
+        spec = json.loads(json.dumps(ischeme.to_spec()))
+        restored = IS.from_spec(spec)
+
+        assert([constant['kind'] for constant in spec['constants']] == ['value', 'value'])
+        assert(spec['levels'][0][0]['kind'] == kind)
+        assert(list(restored) == list(ischeme))
+        assert(restored.fingerprint() == ischeme.fingerprint())
+
+
+def test_spec_not_describable():
+    with pytest.raises(ValueError):
+        IS(NoConstants() >> ISE(OnDemand(str, 3))).to_spec()
+
+    mesh = named_parameter('mesh', numpy.zeros(3))
+    T = named_parameter('T', list(numpy.linspace(0, 1, 4)))
+    for ischeme in [IS(Constants(mesh) >> ISE([1, 2])),
+                    IS(Constants((1, 2)) >> ISE([1, 2])),
+                    IS(NoConstants() >> ISE(T)),
+                    IS(NoConstants() >> ISE([(1, 2), (3, 4)]))]:
+        with pytest.raises(ValueError):
+            ischeme.to_spec()
+
+
+def test_coordinator_rejects_inexact_spec(tmp_path):
+    mesh = named_parameter('mesh', numpy.zeros(3))
+    T = named_parameter('T', list(numpy.linspace(0, 1, 4)))
+    with pytest.raises(ValueError):
+        DirectoryCoordinator(str(tmp_path), IS(Constants(mesh) >> ISE(T)))
+
+
+def test_directory_sweep(tmp_path, named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': numpy.array([1, 2, 3], dtype=numpy.int32)},
+                           {'y': Arithmetic(0, 10, 20)[::-3]})
+    coordinator = DirectoryCoordinator(str(tmp_path), ischeme, chunksize=4)
+    workers = [DirectoryWorker(str(tmp_path), lease_seconds=5) for _ in range(3)]
+    threads = [threading.Thread(target=w.run, args=(add,)) for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert(coordinator.complete)
+    assert(list(coordinator.results()) == [add(p) for p in ischeme])
+
+
+def test_expired_lease_reclaimed(tmp_path, named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': numpy.array([1, 2, 3], dtype=numpy.int32)},
+                           {'y': Arithmetic(0, 10, 20)[::-3]})
+    coordinator = DirectoryCoordinator(str(tmp_path), ischeme, chunksize=5)
+    dead = DirectoryWorker(str(tmp_path), worker_id='dead', lease_seconds=0.2)
+    leased = dead.acquire()
+    assert(leased == (0, 5))
+
+    alive = DirectoryWorker(str(tmp_path), worker_id='alive', lease_seconds=5)
+    alive.run(add, poll=0.05)
+
+    assert(not dead.heartbeat(*leased))
+    assert(coordinator.progress() == (5, 5))
+    assert(list(coordinator.results(with_index=True)) ==
+           list(enumerate(add(p) for p in ischeme)))
+
+
+def test_stale_takeover_keeps_live_lease(tmp_path, named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': [1, 2, 3]}, {'y': [10, 20]})
+    DirectoryCoordinator(str(tmp_path), ischeme, chunksize=6)
+    first = DirectoryWorker(str(tmp_path), worker_id='first', lease_seconds=5)
+    assert(first.acquire() == (0, 6))
+
+    # Second worker read the lease when it was still an expired one
+    second = DirectoryWorker(str(tmp_path), worker_id='second', lease_seconds=5)
+    read_lease = second._read_lease
+    stale = iter([{'worker': 'dead', 'expires': 0.0}])
+    second._read_lease = lambda path: next(stale, None) or read_lease(path)
+
+    assert(second.acquire() is None)
+    assert(first.heartbeat(0, 6))
+
+
+def test_lost_lease_not_committed(tmp_path, named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': [1, 2, 3]}, {'y': [10, 20]})
+    coordinator = DirectoryCoordinator(str(tmp_path), ischeme, chunksize=6)
+    worker = DirectoryWorker(str(tmp_path), worker_id='slow', lease_seconds=0.3)
+    other = DirectoryWorker(str(tmp_path), worker_id='other', lease_seconds=60)
+
+    def taken_over(values):
+        if values[1] == 1 and values[2] == 10:
+            with open(worker._lease_path(0, 6), 'wb') as lease:
+                lease.write(other._lease_content())
+            time.sleep(0.3)
+        return add(values)
+
+    assert(worker.run(taken_over, wait=False) == 0)
+    assert(coordinator.progress() == (0, 1))
+
+
+def test_worker_adapter(tmp_path):
+    x = named_parameter('x', [1, 2])
+    y = named_parameter('y', [0, 1, 2])
+    ischeme = IS(NoConstants() >> ISE(x) >> ISE(y))
+    coordinator = DirectoryCoordinator(str(tmp_path), ischeme, chunksize=100)
+    DirectoryWorker(str(tmp_path)).run(lambda p: p['y'], adapter=dict_adapter)
+
+    assert(list(coordinator.results()) == [p['y'] for p in dict_adapter(ischeme)])
+
+
+def test_coordinator_other_sweep(tmp_path, named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': numpy.array([1, 2, 3], dtype=numpy.int32)},
+                           {'y': Arithmetic(0, 10, 20)[::-3]})
+    DirectoryCoordinator(str(tmp_path), ischeme, chunksize=4)
+
+    with pytest.raises(ValueError):
+        DirectoryCoordinator(str(tmp_path), IS(NoConstants() >> ISE([1])))
+    with pytest.raises(KeyError):
+        list(DirectoryCoordinator(str(tmp_path), ischeme, chunksize=4).results())
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+
+import pickle
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       NoConstants, named_parameter, ResultGrid
+import numpy
+
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def add(values):
+    return sum(v for v in values if not isinstance(v, str))
+
+
+def check_added(old, new, extension):
+    added = [(i, point) for i, point in enumerate(new) if point not in set(old)]
+    pairs = sorted(extension)
+
+    assert(len(extension) == len(added))
+    assert(pairs == added)
+    assert(extension.indices().tolist() == [i for i, _ in added])
+
+
+def test_appended_values(named_scheme):
+    old = named_scheme({'c': 0.5}, {'x': [1, 2]},
+                       {'y': numpy.array([10, 20]), 'label': [100, 200]},
+                       {'z': ['a', 'b']})
+    new = named_scheme({'c': 0.5}, {'x': [1, 2, 3]},
+                       {'y': numpy.array([10, 20, 30]), 'label': [100, 200]},
+                       {'z': ['a', 'b', 'c']})
+    extension = new.extension(old)
+
+    check_added(old, new, extension)
+    assert(len(extension.schemes) == 2)
+
+
+def test_inserted_and_removed_values(named_scheme):
+    old = named_scheme({'c': 0.5}, {'x': [1, 2, 4]},
+                       {'y': numpy.array([10, 20]), 'label': [100, 200]},
+                       {'z': ['a', 'b']})
+    new = named_scheme({'c': 0.5}, {'x': [1, 3, 4]},
+                       {'y': numpy.array([10, 15, 20]), 'label': [50, 100, 200]},
+                       {'z': ['a', 'q', 'b']})
+    extension = new.extension(old)
+
+    check_added(old, new, extension)
+    mapped = extension.old_to_new(numpy.arange(len(old)))
+    for old_index, new_index in zip(range(len(old)), mapped):
+        if new_index < 0:
+            assert(old[old_index] not in set(new))
+        else:
+            assert(new[int(new_index)] == old[old_index])
+
+
+def test_changed_constant(named_scheme):
+    old = named_scheme({'c': 0.5}, {'x': [1, 2]}, {'y': numpy.array([10]), 'label': [100]},
+                       {'z': ['a']})
+    new = named_scheme({'c': 0.7}, {'x': [1, 2]}, {'y': numpy.array([10]), 'label': [100]},
+                       {'z': ['a']})
+    extension = new.extension(old)
+
+    check_added(old, new, extension)
+    assert(len(extension) == len(new))
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_merged_results(workers, named_scheme):
+    old = named_scheme({'c': 0.5}, {'x': [1, 2]},
+                       {'y': numpy.array([10, 20]), 'label': [100, 200]},
+                       {'z': ['a', 'b']})
+    new = named_scheme({'c': 0.5}, {'x': [0, 1, 2]},
+                       {'y': numpy.array([10, 20]), 'label': [100, 200, 300]},
+                       {'z': ['a', 'b']})
+    old_results = list(old.map(add, workers=1))
+
+    grid = ResultGrid(new)
+    extension = new.extension(old)
+    grid[extension.old_to_new(numpy.arange(len(old)))] = old_results
+    grid.fill(extension.map(add, workers=workers))
+
+    assert(grid.data.ravel().tolist() == [add(point) for point in new])
+
+
+def test_constrained_extension(named_scheme):
+    old = named_scheme({'c': 0.5}, {'x': [1, 2]},
+                       {'y': numpy.array([10, 20]), 'label': [100, 200]},
+                       {'z': ['a', 'b']}).where(
+        lambda x, z: x * 100 != z)
+    new = named_scheme({'c': 0.5}, {'x': [1, 2, 3]},
+                       {'y': numpy.array([10, 20]), 'label': [100, 200, 300]},
+                       {'z': ['a', 'b']}).where(
+        lambda x, z: x * 100 != z)
+
+    check_added(old, new, new.extension(old))
+
+
+def test_unpickled_constrained_extension(named_scheme):
+    old = named_scheme({'c': 0.5}, {'x': [1, 2]}, {'y': [1, 2, 3]}).where(
+        lambda x, y: y != x)
+    new = named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [1, 2, 3]}).where(
+        lambda x, y: y != x)
+    restored = pickle.loads(pickle.dumps(new))
+
+    check_added(old, restored, restored.extension(old))
+    assert(all(y != x for scheme in restored.extension(old).schemes
+               for _, x, y in scheme))
+
+
+def test_large_array_values():
+    first = numpy.zeros(2000)
+    second = first.copy()
+    second[1000] = 1.0
+    old = IS(NoConstants() >> ISE(named_parameter('mesh', [first])) >>
+             ISE(named_parameter('f', [1, 2])))
+    new = IS(NoConstants() >> ISE(named_parameter('mesh', [first, second])) >>
+             ISE(named_parameter('f', [1, 2])))
+    extension = new.extension(old)
+
+    assert(len(extension) == 2)
+    assert(extension.indices().tolist() == [2, 3])
+
+
+def test_different_levels():
+    old = IS(NoConstants() >> ISE(named_parameter('x', [1, 2])))
+    new = IS(NoConstants() >> ISE(named_parameter('w', [1, 2])))
+    with pytest.raises(ValueError):
+        new.extension(old)
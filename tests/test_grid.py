@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       NoConstants, named_parameter, ResultGrid, \
+                       Arithmetic
+import numpy
+
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def energy(values):
+    _, x, a, _, z = values
+    return x * 100 + a * 10 + z
+
+
+def test_grid_shape_and_coords(named_scheme):
+    grid = ResultGrid(named_scheme({'c': 0.5}, {'x': [1, 2, 3]},
+                                   {'a': numpy.array([4, 5]), 'b': ['p', 'q']},
+                                   {'z': [7, 8, 9, 0]}))
+
+    assert(grid.shape == (3, 2, 4))
+    assert(grid.axes == ['x', ('a', 'b'), 'z'])
+    assert(list(grid.coords['b']) == ['p', 'q'])
+    assert(numpy.isnan(grid.data).all())
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_grid_fill_from_map(workers, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2, 3]},
+                           {'a': numpy.array([4, 5]), 'b': ['p', 'q']},
+                           {'z': [7, 8, 9, 0]})
+    grid = ResultGrid(ischeme, dtype=numpy.int64)
+    grid.fill(ischeme.map(energy, workers=workers, ordered=False, with_index=True))
+
+    assert(grid.sel(x=2, z=9).tolist() == [249, 259])
+    assert(grid.sel(b='q', z=0).tolist() == [150, 250, 350])
+    assert(grid.sel(x=3, a=4, z=8) == 348)
+    assert(grid[5] == energy(ischeme[5]))
+
+
+def test_grid_sel_is_view(named_scheme):
+    grid = ResultGrid(named_scheme({'c': 0.5}, {'x': [1, 2, 3]},
+                                   {'a': numpy.array([4, 5]), 'b': ['p', 'q']},
+                                   {'z': [7, 8, 9, 0]}))
+    view = grid.sel(x=1)
+    view[...] = 1.0
+
+    assert(numpy.shares_memory(view, grid.data))
+    assert(grid.isel(x=0).sum() == 8)
+    assert(numpy.isnan(grid.isel(x=1)).all())
+    with pytest.raises(KeyError):
+        grid.sel(x=10)
+    with pytest.raises(KeyError):
+        grid.sel(w=1)
+
+
+def test_grid_lazy_coords(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2]}, {'T': Arithmetic(100.0, 50.0, 4)})
+    grid = ResultGrid(ischeme)
+    for index, (_, x, T) in enumerate(ischeme):
+        grid[index] = x * T
+
+    assert(isinstance(grid.coords['T'], numpy.ndarray))
+    assert(grid.coords['T'].tolist() == [100.0, 150.0, 200.0, 250.0])
+    assert(grid.sel(T=150.0).tolist() == [150.0, 300.0])
+
+
+def test_grid_constrained(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2, 3]},
+                           {'a': numpy.array([4, 5]), 'b': ['p', 'q']},
+                           {'z': [7, 8, 9, 0]}).where(lambda x, a: x + a > 6)
+    grid = ResultGrid(ischeme).fill(map(energy, ischeme), with_index=False)
+
+    assert(numpy.isnan(grid.sel(x=1)).all())
+    assert(grid.sel(x=2, a=5).tolist() == [257, 258, 259, 250])
+
+
+def test_grid_memmap(tmp_path):
+    path = str(tmp_path / 'grid.npy')
+    ischeme = IS(NoConstants() >> ISE(named_parameter('x', [1, 2])) >>
+                 ISE(named_parameter('y', [3, 4, 5])))
+    grid = ResultGrid(ischeme, item_shape=(2,), path=path)
+    grid[4] = [1.0, 2.0]
+    grid.flush()
+
+    reopened = ResultGrid.open(ischeme, path)
+    assert(isinstance(reopened.data, numpy.memmap))
+    assert(reopened.sel(x=2, y=4).tolist() == [1.0, 2.0])
+    reopened[numpy.array([0, 1])] = numpy.zeros((2, 2))
+    assert(reopened.isel(x=0, y=1).tolist() == [0.0, 0.0])
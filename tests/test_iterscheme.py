@@ -4,7 +4,9 @@
 import pytest
 from iterscheme import IterationSchemeElement, IterationScheme, \
                        NoConstants, Constants, named_parameter, \
-                       dict_adapter, namedtuple_adapter
+                       dict_adapter, namedtuple_adapter, slots_adapter, \
+                       row_adapter
+from iterscheme.iterscheme import adapter, _loops
 import numpy
 
 IS = IterationScheme
@@ -326,4 +328,423 @@ def test_slice_numpy():
     assert(sl1[2] == 3)
     assert(sl2[0] == 4)
     assert(sl2[1] == 5)
-    assert(sl2[2] == 6)
\ No newline at end of file
+    assert(sl2[2] == 6)
+
+def test_len():
+    assert(len(IS(NoConstants())) == 1)
+    assert(len(IS(Constants(0.5, 's'))) == 1)
+    assert(len(IS(Constants(0.5) >> ISE([1,2,3]) >> ISE([4,5]))) == 6)
+    assert(len(IS(NoConstants() >> ISE([1,2,3], 'abc') >> ISE([]))) == 0)
+
+
+def test_random_access():
+    c1 = named_parameter('c1', 0.5)
+    x = named_parameter('x', [1,2,3])
+    y = named_parameter('y', numpy.array([4,5,6,7]))
+    z = named_parameter('z', 'abcd')
+    ischeme = IS(Constants(c1) >> ISE(x) >> ISE(y, z) >> ISE([8,9]))
+    ischeme_content = list(ischeme)
+
+    assert(len(ischeme) == len(ischeme_content) == 24)
+    for k, point in enumerate(ischeme_content):
+        assert(ischeme[k] == point)
+        assert(ischeme[k - 24] == point)
+    assert(ischeme[13] == (0.5, 2, 6, 'c', 9))
+
+
+def test_random_access_slices():
+    ischeme = IS(Constants(0.5) >> ISE([1,2,3]) >> ISE([4,5,6]))
+    ischeme_content = list(ischeme)
+
+    assert(ischeme[:] == ischeme_content)
+    assert(ischeme[2:7] == ischeme_content[2:7])
+    assert(ischeme[1:8:3] == ischeme_content[1:8:3])
+    assert(ischeme[::-2] == ischeme_content[::-2])
+
+
+def test_random_access_out_of_range():
+    ischeme = IS(Constants(0.5) >> ISE([1,2,3]))
+
+    with pytest.raises(IndexError):
+        ischeme[3]
+    with pytest.raises(IndexError):
+        ischeme[-4]
+    with pytest.raises(TypeError):
+        ischeme[1.0]
+
+
+def test_reiteration():
+    ischeme = IS(Constants(0.5) >> ISE([1,2,3]))
+
+    assert(list(ischeme) == list(ischeme))
+    assert(len(ischeme) == 3)
+    assert(ischeme[0] == (0.5, 1))
+
+
+def test_iter_batches():
+    c1 = named_parameter('c1', 0.5)
+    x = named_parameter('x', numpy.array([1,2,3], dtype=numpy.int16))
+    y = named_parameter('y', 'abcd')
+    ischeme = IS(Constants(c1) >> ISE(x) >> ISE(y, [4.,5.,6.,7.]))
+    batches = list(ischeme.iter_batches(5))
+
+    assert([len(b['x']) for b in batches] == [5, 5, 2])
+    assert(list(batches[0]) == ['c1', 'x', 'y', 'f3'])
+    assert(batches[0]['x'].dtype == numpy.int16)
+
+    rows = [tuple(b[name][i] for name in b)
+            for b in batches for i in range(len(b['x']))]
+    assert(rows == list(ischeme))
+
+
+def test_iter_batches_vector_var():
+    ischeme = IS(Constants([1,2]) >> ISE([[1,2,3], [4,5,6]]))
+    batch, = ischeme.iter_batches(10)
+
+    assert(batch['f0'].dtype == object)
+    assert(list(batch['f0']) == [[1,2], [1,2]])
+    assert(list(batch['f1']) == [[1,2,3], [4,5,6]])
+
+
+def test_slots_adapter():
+    c1 = named_parameter('c1', 0.5)
+    x = named_parameter('x', [1,2,3])
+    y = named_parameter('y', ['a','b','c'])
+
+    ischeme = Constants(c1) >> ISE(x) >> ISE(y)
+    ischeme_content = list(slots_adapter(IS(ischeme)))
+
+    assert(len(ischeme_content) == 9)
+    assert(type(ischeme_content[0]) is type(ischeme_content[8]))
+    assert(not hasattr(ischeme_content[0], '__dict__'))
+    for entry, xval, yval in zip(ischeme_content, [1,1,1,2,2,2,3,3,3], ['a','b','c']*3):
+        assert(entry.c1 == 0.5)
+        assert(entry.x == xval)
+        assert(entry.y == yval)
+    assert(tuple(ischeme_content[4]) == (0.5, 2, 'b'))
+
+
+def test_slots_adapter_invalid_name():
+    x = named_parameter('not valid', [1,2,3])
+
+    with pytest.raises(ValueError):
+        list(slots_adapter(IS(NoConstants() >> ISE(x))))
+
+
+def test_row_adapter():
+    c1 = named_parameter('c1', 0.5)
+    x = named_parameter('x', numpy.array([1,2,3], dtype=numpy.int8))
+
+    ischeme = IS(Constants(c1) >> ISE(x))
+    rows = [row.copy() for row in row_adapter(ischeme)]
+
+    assert(rows[0].dtype.names == ('c1', 'x'))
+    assert(rows[0].dtype['x'] == numpy.int8)
+    assert([row['x'] for row in rows] == [1,2,3])
+    assert(all(row['c1'] == 0.5 for row in rows))
+
+
+def test_namedtuple_adapter_shares_class():
+    x = named_parameter('x', [1,2,3])
+    ischeme_content = list(namedtuple_adapter(IS(NoConstants() >> ISE(x))))
+
+    assert(len(set(type(entry) for entry in ischeme_content)) == 1)
+    assert(ischeme_content[2] == (3,))
+
+
+def test_compiled_adapter():
+    compilations = []
+
+    @adapter(lambda var: var.parameter_name, compiled=True)
+    def upper_adapter(names):
+        compilations.append(names)
+        keys = [name.upper() for name in names]
+        return lambda values: dict(zip(keys, values))
+
+    x = named_parameter('x', [1,2,3])
+    ischeme = IS(NoConstants() >> ISE(x))
+    adapt = upper_adapter.compile(ischeme)
+
+    assert(list(upper_adapter(ischeme)) == [dict(X=1), dict(X=2), dict(X=3)])
+    assert(adapt((5,)) == dict(X=5))
+    assert(len(compilations) == 2)
+
+
+def test_named_numpy_noncontiguous():
+    data = numpy.arange(12).reshape(3, 4)
+    x = named_parameter('x', data[:, 1])
+    ischeme_content = list(IS(NoConstants() >> ISE(x)))
+
+    assert(numpy.shares_memory(x, data))
+    assert(ischeme_content == [(1,), (5,), (9,)])
+
+
+def test_named_numpy_views():
+    data = numpy.arange(6)
+    x = named_parameter('x', data)
+    part = x[2:5]
+
+    assert(part.parameter_name == 'x')
+    assert(numpy.shares_memory(part, data))
+
+    parts = (NoConstants() >> ISE(x).split(2)).nested_variables
+    for part in parts:
+        assert(part[1][0].parameter_name == 'x')
+        assert(numpy.shares_memory(part[1][0], data))
+
+
+def test_named_memmap(tmp_path):
+    import pathlib
+    path = tmp_path / 'x.npy'
+    numpy.save(path, numpy.arange(10, dtype=numpy.float32))
+
+    x = named_parameter('x', pathlib.Path(path))
+    part = x[3:6]
+
+    assert(isinstance(x, numpy.memmap))
+    assert(isinstance(part, numpy.memmap))
+    assert(part.parameter_name == 'x')
+    assert(part.dtype == numpy.float32)
+    assert(list(part) == [3, 4, 5])
+    assert(list(IS(NoConstants() >> ISE(x)))[-1] == (9.0,))
+
+
+def test_named_parameter_class_cache():
+    x1 = named_parameter('x', [1,2,3])
+    x2 = named_parameter('x', [4,5])
+    y = named_parameter('y', [1,2,3])
+
+    assert(type(x1) is type(x2))
+    assert(type(x1) is not type(y))
+    assert(type(x1[1:]) is type(x1))
+    assert(type(named_parameter('x', x1)) is type(x1))
+
+
+def test_named_parameter_pickle():
+    import pickle
+    for values in [[1,2,3], 'abc', 0.5, numpy.arange(4)[::2]]:
+        x = named_parameter('x', values)
+        restored = pickle.loads(pickle.dumps(x))
+
+        assert(restored.parameter_name == 'x')
+        assert(list(numpy.atleast_1d(restored)) == list(numpy.atleast_1d(x)))
+
+
+def test_independent_iterators():
+    ischeme = IS(Constants(0.5) >> ISE([1,2,3]) >> ISE('ab'))
+    first = iter(ischeme)
+    second = iter(ischeme)
+
+    assert(next(first) == (0.5, 1, 'a'))
+    assert(next(first) == (0.5, 1, 'b'))
+    assert(next(second) == (0.5, 1, 'a'))
+    assert(list(first) == list(ischeme)[2:])
+
+
+def test_compiled_plan():
+    ischeme = IS(Constants(0.5) >> ISE([1,2,3]) >> ISE('ab'))
+    plan = ischeme.compile()
+
+    assert(plan is ischeme.compile())
+    assert(plan.sizes == (1, 3, 2))
+    assert(plan.strides == (6, 2, 1))
+    assert(plan.length == 6)
+    with pytest.raises(AttributeError):
+        plan.sizes = (1, 1, 1)
+
+
+def test_plan_components_built_on_iteration():
+    x = numpy.arange(100000, dtype=float)
+    ischeme = IS(Constants(0.5) >> ISE(x) >> ISE('ab'))
+    plan = ischeme.compile()
+
+    assert(len(ischeme) == 200000)
+    assert(ischeme[3] == (0.5, 1.0, 'b'))
+    assert(list(plan.iter_range(3, 6)) == [(0.5, 1.0, 'b'), (0.5, 2.0, 'a'), (0.5, 2.0, 'b')])
+    assert(sum(len(shard) for shard in ischeme.shards(4)) == 200000)
+    assert('components' not in vars(plan))
+
+    assert(next(iter(ischeme)) == (0.5, 0.0, 'a'))
+    assert('components' in vars(plan))
+    assert(list(plan.iter_range(3, 6)) == [(0.5, 1.0, 'b'), (0.5, 2.0, 'a'), (0.5, 2.0, 'b')])
+
+
+def test_lazy_levels_generated_loops():
+    ischeme = IS(Constants(0.5) >> ISE(range(3), 'abc') >> ISE(range(2)))
+    plan = ischeme.compile()
+
+    assert(list(ischeme) == [(0.5, i, l, j) for i, l in zip(range(3), 'abc')
+                             for j in range(2)])
+    assert('components' not in vars(plan))
+    assert(list(IS(NoConstants() >> ISE(range(1)) >> ISE(range(2)))) == [(0, 0), (0, 1)])
+
+
+def test_concurrent_iteration():
+    from concurrent.futures import ThreadPoolExecutor
+    ischeme = IS(Constants(0.5) >> ISE(list(range(100))) >> ISE(list(range(50))))
+    expected = list(ischeme)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: list(ischeme), range(16)))
+
+    assert(all(result == expected for result in results))
+
+
+def test_iter_range_blocks():
+    ischeme = IS(Constants(0.5) >> ISE([1,2,3]) >> ISE('abcd') >> ISE([7,8]))
+    plan = ischeme.compile()
+    content = list(ischeme)
+
+    for start in range(len(content) + 1):
+        for stop in range(start, len(content) + 1):
+            assert(list(plan.iter_range(start, stop)) == content[start:stop])
+
+
+def test_spans():
+    plan = IS(Constants(0.5) >> ISE([1,2,3]) >> ISE('abcd')).compile()
+
+    assert(list(plan.spans(3, 10)) ==
+           [((0, 0), 2, 3, 4), ((0,), 1, 1, 2), ((0, 2), 2, 0, 2)])
+    assert(list(plan.spans(0, 12)) == [((), 0, 0, 1)])
+    assert(list(IS(Constants(0.5) >> ISE(list(range(100)))).compile().spans(25, 50)) ==
+           [((0,), 1, 25, 50)])
+
+
+def test_shards():
+    ischeme = IS(Constants(0.5) >> ISE([1,2,3]) >> ISE([4,5,6,7,8]))
+    content = list(ischeme)
+    shards = ischeme.shards(8)
+
+    assert(len(shards) == 8)
+    assert(set(len(shard) for shard in shards) == {1, 2})
+    assert([point for shard in shards for point in shard] == content)
+    assert([list(shard.indices()) for shard in shards][-1] == [13, 14])
+    assert(shards[3][0] == content[shards[3].start])
+    assert(shards[3][-1] == content[shards[3].stop - 1])
+    assert(shards[3][0:2] == content[shards[3].start:shards[3].stop][0:2])
+    assert(shards[0][::-1] == content[shards[0].start:shards[0].stop][::-1])
+
+
+def test_shards_short_level():
+    ischeme = IS(NoConstants() >> ISE([1,2,3]))
+    shards = ischeme.shards(8)
+
+    assert(sorted(len(shard) for shard in shards) == [0]*5 + [1]*3)
+    assert([point for shard in shards for point in shard] == list(ischeme))
+
+
+def test_shard_pickle():
+    import pickle
+    x = named_parameter('x', list(range(10)))
+    ischeme = IS(Constants(named_parameter('c', 0.5)) >> ISE(x) >> ISE('ab'))
+    shard = ischeme.shards(3)[1]
+    restored = pickle.loads(pickle.dumps(shard))
+
+    assert(list(restored) == list(shard))
+    assert(restored.ischeme.column_names() == ['c', 'x', 'f2'])
+
+
+def make_constrained():
+    c = named_parameter('c', 0.5)
+    x = named_parameter('x', [1,2,3,4])
+    y = named_parameter('y', [0,1,2,3,4])
+    z = named_parameter('z', 'ab')
+    return IS(Constants(c) >> ISE(x) >> ISE(y) >> ISE(z))
+
+
+def test_where():
+    ischeme = make_constrained()
+    pruned = ischeme.where(lambda x, y: y < x)
+    expected = [p for p in ischeme if p[2] < p[1]]
+
+    assert(len(pruned) == len(expected) == 20)
+    assert(list(pruned) == expected)
+    assert([pruned[k] for k in range(len(pruned))] == expected)
+    assert(pruned[-1] == expected[-1])
+    assert(pruned[3:17:4] == expected[3:17:4])
+    assert(len(ischeme) == 40)
+
+
+def test_where_prunes_subtrees():
+    calls = []
+
+    def outer(x):
+        calls.append(x)
+        return x % 2 == 0
+
+    ischeme = make_constrained().where(outer).where(lambda x, y: y < x)
+
+    assert(list(ischeme) == [p for p in make_constrained()
+                             if p[1] % 2 == 0 and p[2] < p[1]])
+    # Once per x value for each of two compilations, not per point
+    assert(calls == [1,2,3,4] * 2)
+
+
+def test_where_level():
+    ischeme = make_constrained().where(lambda values: values[2] == values[1] - 1,
+                                       level=2)
+
+    assert(list(ischeme) == [p for p in make_constrained() if p[2] == p[1] - 1])
+    with pytest.raises(ValueError):
+        make_constrained().where(lambda values: True, level=7)
+    with pytest.raises(ValueError):
+        make_constrained().where(lambda w: True)
+
+
+def test_where_shards_adapters_batches():
+    import pickle
+    ischeme = make_constrained().where(lambda x, y: y < x)
+    expected = list(ischeme)
+
+    shards = ischeme.shards(3)
+    assert([p for shard in shards for p in shard] == expected)
+    assert(list(pickle.loads(pickle.dumps(shards[1]))) == list(shards[1]))
+    assert([tuple(d.values()) for d in dict_adapter(ischeme)] == expected)
+
+    rows = [tuple(b[name][i] for name in b)
+            for b in ischeme.iter_batches(7) for i in range(len(b['x']))]
+    assert(rows == expected)
+    assert(ischeme.fingerprint() != make_constrained().fingerprint())
+
+
+def test_where_after_pickle():
+    import pickle
+    ischeme = make_constrained().where(lambda x, y: y < x)
+    restored = pickle.loads(pickle.dumps(ischeme))
+
+    assert(list(restored) == list(ischeme))
+    assert(list(restored.where(lambda x: x > 1)) ==
+           [p for p in ischeme if p[1] > 1])
+    assert(list(restored.where(lambda z: z == 'a')) ==
+           [p for p in ischeme if p[3] == 'a'])
+
+
+def test_where_lazy():
+    from iterscheme import Arithmetic
+    x = named_parameter('x', Arithmetic(0, 1, 5))
+    y = named_parameter('y', [0,1,2,3,4])
+    ischeme = IS(NoConstants() >> ISE(x) >> ISE(y)).where(lambda x, y: x + y == 4)
+
+    assert(list(ischeme) == [(0,4), (1,3), (2,2), (3,1), (4,0)])
+    assert(ischeme[2] == (2,2))
+
+
+def test_generated_loops_shared_by_shape():
+    first = IS(Constants(0.5) >> ISE([1, 2]) >> ISE([3, 4], 'ab'))
+    second = IS(Constants('c') >> ISE([5, 6, 7]) >> ISE([8], 'x'))
+    assert(list(first) == [(0.5, 1, 3, 'a'), (0.5, 1, 4, 'b'),
+                           (0.5, 2, 3, 'a'), (0.5, 2, 4, 'b')])
+    assert(list(second) == [('c', 5, 8, 'x'), ('c', 6, 8, 'x'), ('c', 7, 8, 'x')])
+    assert(_loops((1, 1, 2), 1) is
+           _loops((1, 1, 2), 1))
+
+
+def test_generated_loops_too_deep():
+    element = NoConstants()
+    for _ in range(19):
+        element = element >> ISE([0, 1])
+    ischeme = IS(element.nested_variables)
+
+    assert(len(list(ischeme)) == 2**19)
+    assert(ischeme[2**19 - 1] == (1,) * 19)
+    assert(list(ischeme.compile().iter_range(5, 7)) == [ischeme[5], ischeme[6]])
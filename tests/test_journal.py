@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       Constants, named_parameter, Journal
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def add(values):
+    return sum(values)
+
+
+def test_fingerprint(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [4, 5, 6]})
+    same = named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [4, 5, 6]})
+    other = named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [4, 5, 7]})
+    assert(ischeme.fingerprint() == same.fingerprint())
+    assert(ischeme.fingerprint() != other.fingerprint())
+
+    renamed = IS(Constants(named_parameter('d', 0.5)) >>
+                 ISE(named_parameter('x', [1,2,3])) >>
+                 ISE(named_parameter('y', [4,5,6])))
+    assert(ischeme.fingerprint() != renamed.fingerprint())
+
+
+def test_journal_out_of_order(tmp_path, named_scheme):
+    path = str(tmp_path / 'sweep.journal')
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [4, 5, 6]})
+    with Journal(path, ischeme, sync_every=2) as journal:
+        for index in [7, 0, 1, 2, 5]:
+            journal.add(index)
+
+    journal = Journal(path, ischeme)
+    assert(journal.completed == 5)
+    assert(journal.missing() == [(3, 5), (6, 7), (8, 9)])
+    assert(5 in journal and 6 not in journal)
+    journal.close()
+
+
+def test_journal_fingerprint_mismatch(tmp_path, named_scheme):
+    path = str(tmp_path / 'sweep.journal')
+    Journal(path, named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [4, 5, 6]})).close()
+
+    with pytest.raises(ValueError):
+        Journal(path, named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [4, 5, 7]}))
+
+
+def test_journal_torn_line(tmp_path, named_scheme):
+    path = str(tmp_path / 'sweep.journal')
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [4, 5, 6]})
+    with Journal(path, ischeme) as journal:
+        journal.add(0)
+    with open(path, 'a') as f:
+        f.write('3 ')
+
+    with Journal(path, ischeme) as journal:
+        assert(journal.missing() == [(1, 9)])
+
+
+@pytest.mark.parametrize('header', ['', '{"fingerprint": "ab'])
+def test_journal_torn_header(tmp_path, header, named_scheme):
+    path = tmp_path / 'sweep.journal'
+    path.write_text(header)
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [4, 5, 6]})
+
+    with Journal(path, ischeme) as journal:
+        assert(journal.missing() == [(0, 9)])
+    assert(list(ischeme.map(add, workers=1, journal=path)) == [add(p) for p in ischeme])
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_map_resume(tmp_path, workers, named_scheme):
+    path = str(tmp_path / 'sweep.journal')
+    ischeme = named_scheme({'c': 0.5}, {'x': [1, 2, 3]}, {'y': [4, 5, 6]})
+    expected = list(enumerate(add(p) for p in ischeme))
+
+    first = []
+    for item in ischeme.map(add, workers=workers, chunksize=2,
+                            with_index=True, journal=path):
+        first.append(item)
+        if len(first) == 4:
+            break
+
+    rest = list(ischeme.map(add, workers=workers, chunksize=2,
+                            with_index=True, journal=path))
+
+    # The last result taken before break is not confirmed by asking
+    # for the next one, so it is evaluated again
+    assert(first == expected[:4])
+    assert(rest == expected[3:])
+    assert(list(ischeme.map(add, workers=workers, journal=path)) == [])
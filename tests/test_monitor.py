@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+
+import time
+import pytest
+from iterscheme import dict_adapter, Monitor
+from iterscheme.monitor import Histogram
+
+
+def slow_on_x(point):
+    if point['x'] == 3 and point['y'] == 20:
+        time.sleep(0.02)
+    return point['x'] + point['y']
+
+
+def test_histogram():
+    histogram = Histogram()
+    for nanoseconds in [1000] * 90 + [10**6] * 10:
+        histogram.add(nanoseconds)
+
+    summary = histogram.summary()
+    assert(summary['count'] == 100)
+    assert(1e-6 <= summary['p50'] < 2e-6)
+    assert(summary['p99'] == summary['max'] == 1e-3)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_map_monitor(workers, named_scheme):
+    ischeme = named_scheme({}, {'x': list(range(5))}, {'y': list(range(0, 50, 10))})
+    snapshots = []
+    monitor = Monitor(slowest=2, every=10)
+    monitor.add_hook(snapshots.append)
+    results = list(ischeme.map(slow_on_x, workers=workers, chunksize=3,
+                               adapter=dict_adapter, monitor=monitor))
+
+    assert(results == [x + y for x in range(5) for y in range(0, 50, 10)])
+    assert([s['points'] for s in snapshots] == [10, 20, 25])
+    snapshot = monitor.snapshot()
+    assert(snapshot['finished'] and snapshot['progress'] == 1.0)
+    assert(snapshot['eta'] == 0.0 and snapshot['points_per_second'] > 0)
+    assert(set(snapshot['stages']) == {'iterate', 'adapt', 'evaluate', 'handle'})
+    assert(all(s['count'] == 25 for s in snapshot['stages'].values()))
+    slowest = snapshot['slowest']
+    assert(len(slowest) == 2)
+    assert(slowest[0]['index'] == 17 and slowest[0]['values'] == {'x': 3, 'y': 20})
+    assert(slowest[0]['seconds'] >= 0.02)
+
+
+def test_iterate_progress(named_scheme):
+    ischeme = named_scheme({}, {'x': list(range(5))}, {'y': list(range(0, 50, 10))})
+    monitor = Monitor(every=5)
+    for i, _ in enumerate(monitor.iterate(ischeme)):
+        if i == 9:
+            snapshot = monitor.snapshot()
+            assert(snapshot['points'] == 9 and snapshot['total'] == 25)
+            assert(snapshot['eta'] is not None)
+
+    snapshot = monitor.snapshot()
+    assert(snapshot['points'] == 25 and snapshot['finished'])
+    assert(set(snapshot['stages']) == {'iterate', 'handle'})
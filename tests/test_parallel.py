@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       Constants, NoConstants, dict_adapter, \
+                       namedtuple_adapter
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def add(values):
+    return sum(values)
+
+
+def sum_xy(point):
+    return point['x'] + point['y']
+
+
+def fail_on_five(values):
+    if values[1] == 5:
+        raise RuntimeError("five")
+    return values
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_map_ordered(workers, named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': list(range(7))}, {'y': list(range(0, 50, 10))})
+    results = list(ischeme.map(add, workers=workers, chunksize=4))
+
+    assert(results == [sum(values) for values in ischeme])
+
+
+def test_map_unordered(named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': list(range(7))}, {'y': list(range(0, 50, 10))})
+    results = list(ischeme.map(add, workers=3, chunksize=2,
+                               ordered=False, with_index=True))
+
+    assert(sorted(index for index, _ in results) == list(range(len(ischeme))))
+    for index, result in results:
+        assert(result == sum(ischeme[index]))
+
+
+def test_map_adapter(named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': list(range(7))}, {'y': list(range(0, 50, 10))})
+    results = list(ischeme.map(sum_xy, workers=2, adapter=dict_adapter))
+
+    assert(results == [p['x'] + p['y'] for p in dict_adapter(ischeme)])
+
+
+def test_map_namedtuple_adapter(named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': list(range(7))}, {'y': list(range(0, 50, 10))})
+    results = list(ischeme.map(tuple, workers=1, adapter=namedtuple_adapter))
+
+    assert(results == list(ischeme))
+
+
+def test_map_exception():
+    ischeme = IS(Constants(0.5) >> ISE([1,2,3,4,5,6]))
+
+    with pytest.raises(RuntimeError):
+        list(ischeme.map(fail_on_five, workers=2, chunksize=1))
+
+
+def test_map_with_index_order():
+    ischeme = IS(Constants(0.5) >> ISE([1,2,3]) >> ISE([4,5]))
+    results = list(ischeme.map(add, workers=1, with_index=True))
+
+    assert(results == list(enumerate(add(p) for p in ischeme)))
+
+
+def test_iter_range(named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': list(range(7))}, {'y': list(range(0, 50, 10))})
+    content = list(ischeme)
+
+    plan = ischeme.compile()
+
+    assert(list(plan.iter_range(3, 29)) == content[3:29])
+    assert(list(plan.iter_range(0, len(ischeme))) == content)
+
+
+def test_map_constrained(named_scheme):
+    ischeme = named_scheme({'c': 100}, {'x': list(range(7))},
+                           {'y': list(range(0, 50, 10))}).where(lambda x, y: y > 10 * x)
+    results = list(ischeme.map(add, workers=2, chunksize=3, with_index=True))
+
+    assert(results == list(enumerate(add(p) for p in ischeme)))
+    assert(len(results) < len(named_scheme({'c': 100}, {'x': list(range(7))},
+                                           {'y': list(range(0, 50, 10))})))
+
+
+def tag_a(values):
+    return 'A', values
+
+
+def tag_b(values):
+    return 'B', values
+
+
+def test_interleaved_serial_maps():
+    first = IS(NoConstants() >> ISE([0, 1, 2, 3]))
+    second = IS(NoConstants() >> ISE([100, 101, 102, 103]))
+    a = first.map(tag_a, workers=1, chunksize=2)
+    b = second.map(tag_b, workers=1, chunksize=2)
+
+    assert([next(a), next(b), next(a), next(a), next(b)] ==
+           [('A', (0,)), ('B', (100,)), ('A', (1,)), ('A', (2,)), ('B', (101,))])
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       NoConstants, dict_adapter
+from iterscheme.sampling import sobol
+import numpy
+
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+METHODS = ['uniform', 'stratified', 'sobol', 'latin_hypercube']
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_sample_huge_scheme(method, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, *({'p{}'.format(i): list(range(100))} for i in range(5)))
+    indices = ischeme.sample_indices(1000, method=method, seed=3)
+    points = ischeme.sample(1000, method=method, seed=3)
+
+    assert(len(set(indices.tolist())) == len(indices) == 1000)
+    assert(indices.min() >= 0 and indices.max() < len(ischeme))
+    assert(points[:3] == [ischeme[int(i)] for i in indices[:3]])
+    assert((ischeme.sample_indices(1000, method=method, seed=3) == indices).all())
+    assert(not (ischeme.sample_indices(1000, method=method, seed=4) == indices).all())
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_sample_shards_disjoint(method, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, *({'p{}'.format(i): list(range(50))} for i in range(3)))
+    full = ischeme.sample_indices(300, method=method, seed=1)
+    shards = [ischeme.sample_indices(300, method=method, seed=1, shard=(i, 4))
+              for i in range(4)]
+
+    assert(sorted(numpy.concatenate(shards).tolist()) == sorted(full.tolist()))
+
+
+def test_stratified_covers_strata(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, *({'p{}'.format(i): list(range(10))} for i in range(2)))
+    indices = ischeme.sample_indices(10, method='stratified')
+
+    assert((indices // 10).tolist() == list(range(10)))
+
+
+@pytest.mark.parametrize('method', ['sobol', 'latin_hypercube'])
+def test_level_space_covers_levels(method, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, *({'p{}'.format(i): list(range(8))} for i in range(3)))
+    points = ischeme.sample(8, method=method, seed=7, adapter=dict_adapter)
+
+    assert(len(points) == 8)
+    for name in ['p0', 'p1', 'p2']:
+        assert(sorted(point[name] for point in points) == list(range(8)))
+
+
+def test_sobol_sequence():
+    assert(sobol(4, 2).tolist() == [[0.0, 0.0], [0.5, 0.5], [0.75, 0.25], [0.25, 0.75]])
+    with pytest.raises(ValueError):
+        sobol(4, 30)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_sample_constrained(method, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'p0': list(range(20))}, {'p1': list(range(20))})
+    ischeme = ischeme.where(lambda p0: p0 % 2 == 0)
+    points = ischeme.sample(50, method=method)
+
+    assert(points and all(point[1] % 2 == 0 for point in points))
+
+
+def test_sample_errors():
+    ischeme = IS(NoConstants() >> ISE([1, 2, 3]))
+    with pytest.raises(ValueError):
+        ischeme.sample(2, method='halton')
+    with pytest.raises(ValueError):
+        ischeme.sample(4)
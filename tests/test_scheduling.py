@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       NoConstants, dict_adapter, CostScheduler
+from iterscheme.scheduling import predict_makespan
+
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def add(values):
+    return sum(values)
+
+
+def point_cost(point):
+    return point['L'] ** 3
+
+
+def test_predict_makespan():
+    assert(predict_makespan([5, 4, 3, 3, 3], 2) == 10)
+    assert(predict_makespan([3, 3, 2, 2, 2], 2) == 7)
+    assert(predict_makespan([], 3) == 0)
+
+
+def test_range_cost_separable(named_scheme):
+    ischeme = named_scheme({'c': 1}, {'L': [2, 4, 8, 16]}, {'T': [0.5, 1.0, 2.0]})
+    scheduler = CostScheduler(ischeme, workers=2,
+                              costs={'L': lambda L: L ** 3, 'T': lambda T: 1 / T})
+    expected = [L ** 3 / T for _, L, T in ischeme]
+
+    for start in range(len(ischeme)):
+        for stop in range(start, len(ischeme) + 1):
+            assert(scheduler.range_cost(start, stop) ==
+                   pytest.approx(sum(expected[start:stop])))
+
+
+def test_chunks_cover_scheme(named_scheme):
+    ischeme = named_scheme({'c': 1}, {'L': [2, 4, 8, 16]}, {'T': [0.5, 1.0, 2.0]})
+    scheduler = CostScheduler(ischeme, workers=2, cost=point_cost,
+                              adapter=dict_adapter, chunks_per_worker=2)
+    chunks = sorted(scheduler.chunks)
+    costs = [chunk[2] for chunk in scheduler.chunks]
+
+    assert(costs == sorted(costs, reverse=True))
+    assert(chunks[0][0] == 0 and chunks[-1][1] == len(ischeme))
+    assert(all(a[1] == b[0] for a, b in zip(chunks[:-1], chunks[1:])))
+    assert(sum(costs) == sum(L ** 3 for _, L, _ in ischeme))
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_scheduled_map(workers, named_scheme):
+    ischeme = named_scheme({'c': 1}, {'L': [2, 4, 8, 16]}, {'T': [0.5, 1.0, 2.0]})
+    scheduler = CostScheduler(ischeme, workers=workers,
+                              costs={'L': lambda L: L ** 3})
+
+    assert(list(scheduler.map(add)) == [add(p) for p in ischeme])
+
+    unordered = list(scheduler.map(add, ordered=False, with_index=True))
+    assert(sorted(unordered) == list(enumerate(add(p) for p in ischeme)))
+
+    report = scheduler.report()
+    assert(report['completed_chunks'] == len(scheduler.chunks))
+    assert(report['actual_makespan'] > 0)
+    assert(report['predicted_makespan'] >= 0)
+
+
+def test_cost_and_costs(named_scheme):
+    with pytest.raises(ValueError):
+        CostScheduler(named_scheme({'c': 1}, {'L': [2, 4, 8, 16]}, {'T': [0.5, 1.0, 2.0]}),
+                      cost=point_cost, costs={})
+
+
+def test_interleaved_serial_schedulers():
+    first = CostScheduler(IS(NoConstants() >> ISE([1, 2, 3, 4])), workers=1)
+    second = CostScheduler(IS(NoConstants() >> ISE([10, 20, 30, 40])), workers=1)
+    a = first.map(add)
+    b = second.map(lambda values: -sum(values))
+
+    assert([next(a), next(b), next(a), next(b)] == [1, -10, 2, -20])
+
+
+class CountingAdapter():
+    def __init__(self):
+        self.compiled = 0
+
+    def compile(self, ischeme):
+        self.compiled += 1
+        return dict_adapter.compile(ischeme)
+
+
+def test_adapter_compiled_once(named_scheme):
+    ischeme = named_scheme({'c': 1}, {'L': [2, 4, 8, 16]}, {'T': [0.5, 1.0, 2.0]})
+    adapter = CountingAdapter()
+    scheduler = CostScheduler(ischeme, workers=2, cost=point_cost,
+                              adapter=adapter, chunks_per_worker=4)
+
+    assert(len(scheduler.chunks) > 1)
+    assert(adapter.compiled == 1)
+
+
+def test_serial_evaluates_in_scheme_order(named_scheme):
+    ischeme = named_scheme({'c': 1}, {'L': [2, 4, 8, 16]}, {'T': [0.5, 1.0, 2.0]})
+    scheduler = CostScheduler(ischeme, workers=1, costs={'L': lambda L: L ** 3},
+                              chunks_per_worker=4)
+    seen = []
+
+    def record(values):
+        seen.append(values)
+        return add(values)
+
+    results = scheduler.map(record)
+    assert(next(results) == add(ischeme[0]))
+    assert(len(seen) < len(ischeme))
+    assert(seen == [tuple(p) for p in list(ischeme)[:len(seen)]])
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+
+import multiprocessing
+import pickle
+import subprocess
+import sys
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       named_parameter, SharedScheme
+from iterscheme import parallel
+from iterscheme.shared import SharedArray
+import numpy
+
+
+def address_and_sum(values):
+    _, x, y = values
+    return x + y
+
+
+def test_large_arrays_shared(named_scheme):
+    shared = SharedScheme(named_scheme({'c': 0.5}, {'x': numpy.arange(5000, dtype=float)},
+                                       {'y': numpy.arange(3, dtype=numpy.int32)}), min_bytes=1024)
+    ischeme = shared.scheme
+    x, y = ischeme.compile().levels[1][0], ischeme.compile().levels[2][0]
+
+    assert(isinstance(x, SharedArray) and x.parameter_name == 'x')
+    assert(not isinstance(y, SharedArray))
+    assert(shared.shared_bytes >= x.nbytes)
+    plain = named_scheme({'c': 0.5}, {'x': numpy.arange(5000, dtype=float)},
+                         {'y': numpy.arange(3, dtype=numpy.int32)})
+    assert(list(ischeme) == list(plain))
+
+    data = pickle.dumps(ischeme)
+    assert(len(data) < 2000)
+    restored = pickle.loads(data)
+    restored_x = restored.compile().levels[1][0]
+    assert(restored_x.parameter_name == 'x')
+    assert(isinstance(restored_x, SharedArray))
+    assert(restored_x._block.name == x._block.name)
+    assert((restored_x == x).all())
+
+    sliced = pickle.loads(pickle.dumps(x[10:20:2]))
+    assert(sliced.parameter_name == 'x' and sliced.tolist() == [10.0, 12.0, 14.0, 16.0, 18.0])
+    assert(pickle.loads(pickle.dumps(x * 2))[3] == 6.0)
+    shared.close()
+
+
+def test_small_scheme_not_shared(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': numpy.arange(5000, dtype=float)},
+                           {'y': numpy.arange(3, dtype=numpy.int32)})
+    shared = SharedScheme(ischeme)
+
+    assert(shared.scheme is ischeme and shared.shared_bytes == 0)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_shared_map(workers, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': numpy.arange(5000, dtype=float)},
+                           {'y': numpy.arange(3, dtype=numpy.int32)})
+    with ischeme.shared(min_bytes=1024) as shared_scheme:
+        results = list(shared_scheme.map(address_and_sum, workers=workers))
+
+    assert(results == [x + y for _, x, y in ischeme])
+
+
+def test_unpickled_constrained_shared(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': numpy.arange(50, dtype=float)},
+                           {'y': numpy.arange(3, dtype=numpy.int32)}).where(lambda x, y: y < x)
+    restored = pickle.loads(pickle.dumps(ischeme))
+    with SharedScheme(restored, min_bytes=0) as shared_scheme:
+        assert(shared_scheme is not restored)
+        assert(list(shared_scheme) == list(ischeme))
+
+
+def worker_plan(_):
+    plan = parallel._WORKER[0].compile()  # pylint: disable=protected-access
+    return 'components' in vars(plan), isinstance(plan.levels[1][0], SharedArray)
+
+
+def test_worker_plan_not_copied(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': numpy.arange(5000, dtype=float)},
+                           {'y': numpy.arange(3, dtype=numpy.int32)})
+    with ischeme.shared(min_bytes=1024) as shared_scheme:
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=parallel._init_worker,
+                                 initargs=(shared_scheme, sum, None)) as pool:
+            pool.submit(parallel._evaluate_range, 0, len(ischeme)).result()
+            built, shared = pool.submit(worker_plan, None).result()
+
+    assert(not built)
+    assert(shared)
+
+
+def test_scheme_keeps_owner_alive(named_scheme):
+    import gc
+    ischeme = named_scheme({'c': 0.5}, {'x': numpy.arange(5000, dtype=float)},
+                           {'y': numpy.arange(3, dtype=numpy.int32)})
+    shared_scheme = ischeme.shared(min_bytes=1024).scheme
+    gc.collect()
+
+    assert(list(pickle.loads(pickle.dumps(shared_scheme))) == list(ischeme))
+
+
+def test_released_block_pickle_error(named_scheme):
+    shared = SharedScheme(named_scheme({'c': 0.5}, {'x': numpy.arange(5000, dtype=float)},
+                                       {'y': numpy.arange(3, dtype=numpy.int32)}), min_bytes=1024)
+    ischeme = shared.scheme
+    shared.close()
+
+    with pytest.raises(ValueError):
+        pickle.dumps(ischeme)
+
+
+def test_blocks_unlinked(named_scheme):
+    shared = SharedScheme(named_scheme({'c': 0.5}, {'x': numpy.arange(5000, dtype=float)},
+                                       {'y': numpy.arange(3, dtype=numpy.int32)}), min_bytes=1024)
+    names = [block.name for block in shared._blocks]
+    shared.close()
+
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name)
+
+
+def test_blocks_unlinked_at_exit():
+    code = ('import numpy, iterscheme\n'
+            'x = iterscheme.named_parameter("x", numpy.zeros(1000))\n'
+            'scheme = iterscheme.IterationScheme(iterscheme.NoConstants() >> '
+            'iterscheme.IterationSchemeElement(x))\n'
+            'shared = scheme.shared(min_bytes=0)\n'
+            'print(shared._blocks[0].name)\n')
+    name = subprocess.run([sys.executable, '-c', code], check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import dict_adapter, ColumnSink, ColumnReader
+import numpy
+
+
+def test_sink_roundtrip(tmp_path, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': numpy.arange(10, dtype=numpy.int16)},
+                           {'y': ['a', 'bb', 'ccc']})
+    with ColumnSink(str(tmp_path), chunk_size=7) as sink:
+        for point in dict_adapter(ischeme):
+            sink.add(point, {'energy': point['x'] * 2.0, 'label': point['y'] * 2})
+
+    reader = ColumnReader(str(tmp_path))
+    assert(reader.columns == ['c', 'x', 'y', 'energy', 'label'])
+    assert(len(reader) == 30)
+    assert(len(list(reader.chunks('x'))) == 5)
+    assert(reader['x'].dtype == numpy.int16)
+    assert(list(reader['x']) == [x for _, x, _ in ischeme])
+    assert(list(reader['label']) == [y * 2 for _, _, y in ischeme])
+    assert(list(reader['energy']) == [x * 2.0 for _, x, _ in ischeme])
+
+
+def test_sink_tuple_points_object_results(tmp_path, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'x': numpy.arange(10, dtype=numpy.int16)},
+                           {'y': ['a', 'bb', 'ccc']})
+    with ColumnSink(str(tmp_path), chunk_size=4, max_buffered_bytes=1) as sink:
+        sink.add_many((point, [point[1]] * point[1]) for point in ischeme)
+
+    reader = ColumnReader(str(tmp_path))
+    assert(reader.columns == ['f0', 'f1', 'f2', 'result'])
+    assert(list(reader['result']) == [[x] * x for _, x, _ in ischeme])
+
+
+def test_sink_schema_change(tmp_path):
+    with ColumnSink(str(tmp_path)) as sink:
+        sink.add({'x': 1}, 2)
+        with pytest.raises(ValueError):
+            sink.add({'y': 1}, 2)
+
+
+def test_sink_empty(tmp_path):
+    with ColumnSink(str(tmp_path)) as sink:
+        sink.add({'x': 1}, 2)
+
+    assert(list(ColumnReader(str(tmp_path))['x']) == [1])
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+
+import pickle
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       NoConstants, Constants, named_parameter, \
+                       dict_adapter, Arithmetic, Geometric, OnDemand, Stream
+import numpy
+
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def test_arithmetic():
+    x = Arithmetic(1.0, 0.5, 5)
+
+    assert(len(x) == 5)
+    assert(list(x) == [1.0, 1.5, 2.0, 2.5, 3.0])
+    assert(x[-1] == 3.0)
+    assert(list(x[1::2]) == [1.5, 2.5])
+    assert(list(x[numpy.array([4, 0])]) == [3.0, 1.0])
+    with pytest.raises(IndexError):
+        x[5]
+
+
+def test_geometric_and_on_demand():
+    assert(list(Geometric(1, 10, 4)) == [1, 10, 100, 1000])
+    assert(list(OnDemand(lambda i: 'v{}'.format(i), 3)[1:]) == ['v1', 'v2'])
+
+
+def test_lazy_levels():
+    ischeme = IS(Constants(0.5) >> ISE(Arithmetic(0, 2, 3)) >>
+                 ISE(range(10**12), OnDemand(str, 2)))
+
+    assert(len(ischeme) == 6)
+    assert(list(ischeme) == [(0.5, 0, 0, '0'), (0.5, 0, 1, '1'),
+                             (0.5, 2, 0, '0'), (0.5, 2, 1, '1'),
+                             (0.5, 4, 0, '0'), (0.5, 4, 1, '1')])
+    assert(ischeme[5] == (0.5, 4, 1, '1'))
+
+
+def test_lazy_huge_level():
+    ischeme = IS(NoConstants() >> ISE(Arithmetic(0, 1, 10**12)) >>
+                 ISE([1, 2]))
+    iterator = iter(ischeme)
+
+    assert(len(ischeme) == 2 * 10**12)
+    assert([next(iterator) for _ in range(3)] == [(0, 1), (0, 2), (1, 1)])
+    assert(ischeme[-1] == (10**12 - 1, 2))
+
+
+def test_named_lazy():
+    x = named_parameter('x', Arithmetic(0, 10, 4))
+    part = x[2:]
+
+    assert(part.parameter_name == 'x')
+    assert(isinstance(part, Arithmetic))
+    assert(list(part) == [20, 30])
+    assert(list(dict_adapter(IS(NoConstants() >> ISE(x)))) ==
+           [dict(x=0), dict(x=10), dict(x=20), dict(x=30)])
+
+    restored = pickle.loads(pickle.dumps(part))
+    assert(restored.parameter_name == 'x')
+    assert(list(restored) == [20, 30])
+
+
+def test_split_lazy():
+    x = named_parameter('x', Arithmetic(0, 1, 6))
+    parts = [list(IS(part))
+             for part in (NoConstants() >> ISE(x).split(2)).nested_variables]
+
+    assert(parts == [[(0,), (1,), (2,)], [(3,), (4,), (5,)]])
+
+
+def test_lazy_batches():
+    x = named_parameter('x', Arithmetic(0.0, 0.25, 4))
+    ischeme = IS(NoConstants() >> ISE(x) >> ISE(range(3)))
+    batch, = ischeme.iter_batches(100)
+
+    assert(batch['x'].dtype == numpy.float64)
+    assert([tuple(row) for row in zip(batch['x'], batch['f1'])] == list(ischeme))
+
+
+def test_stream():
+    opened = []
+
+    def values():
+        opened.append(1)
+        return iter('ab')
+
+    ischeme = IS(Constants(0.5) >> ISE([1, 2]) >> ISE(Stream(values)))
+
+    assert(list(ischeme) == [(0.5, 1, 'a'), (0.5, 1, 'b'),
+                             (0.5, 2, 'a'), (0.5, 2, 'b')])
+    assert(len(opened) == 2)
+    with pytest.raises(TypeError):
+        len(ischeme)
+
+
+def test_stream_outer_level():
+    with pytest.raises(ValueError):
+        IS(NoConstants() >> ISE(Stream(list)) >> ISE([1, 2]))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       NoConstants, named_parameter
+import numpy
+
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def material(c):
+    return {'c': c}
+
+
+def mesh(prepared, thickness, label):
+    return dict(prepared, mesh='{}{}'.format(label, thickness))
+
+
+def solve(prepared, field):
+    return '{}:{}:{}'.format(prepared['c'], prepared['mesh'], field)
+
+
+def expected(ischeme):
+    return ['{}:{}{}:{}'.format(c, l, t, f) for c, t, l, f in ischeme]
+
+
+def test_stages_called_on_change(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'t': [1, 2, 3], 'l': 'abc'}, {'f': [10, 20, 30, 40]})
+    func = ischeme.staged(material, mesh, solve)
+
+    assert([func(values) for values in ischeme] == expected(ischeme))
+    assert(func.calls == [1, 3, 12])
+
+
+def test_large_array_values():
+    first = numpy.zeros(2000)
+    second = first.copy()
+    second[1000] = 1.0
+    ischeme = IS(NoConstants() >> ISE(named_parameter('mesh', [first, second])) >>
+                 ISE([1, 2]))
+    func = ischeme.staged(lambda m: m[1000], lambda value, f: value * f)
+
+    assert([func(values) for values in ischeme] == [0, 0, 1, 2])
+    assert(func.calls == [2, 4])
+
+
+def test_bounded_cache():
+    ischeme = IS(NoConstants() >> ISE([1, 2, 3]) >> ISE([4, 5]))
+    func = ischeme.staged(lambda x: x * 10, lambda x, y: x + y, cache_size=1)
+    results = [func(values) for values in ischeme]
+    results += [func(values) for values in ischeme]
+
+    assert(results == [14, 15, 24, 25, 34, 35] * 2)
+    assert(func.calls == [6, 12])
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_staged_map(workers, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'t': [1, 2, 3], 'l': 'abc'}, {'f': [10, 20, 30, 40]})
+    func = ischeme.staged(material, mesh, solve, cache_size=2)
+    results = list(ischeme.map(func, workers=workers, chunksize=5))
+
+    assert(results == expected(ischeme))
+
+
+def test_stages_count(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'t': [1, 2, 3], 'l': 'abc'}, {'f': [10, 20, 30, 40]})
+    with pytest.raises(ValueError):
+        ischeme.staged(material, solve)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from iterscheme import IterationSchemeElement, IterationScheme, \
+                       NoConstants, dict_adapter, ResultGrid, \
+                       Arithmetic
+from iterscheme.traversal import ordered_digits
+import numpy
+
+IS = IterationScheme
+ISE = IterationSchemeElement
+
+
+def changes(first, second):
+    return [i for i, (u, v) in enumerate(zip(first, second)) if u != v]
+
+
+def test_serpentine_small():
+    digits = ordered_digits(numpy.arange(9), [3, 3], 'serpentine')
+    assert(list(zip(*[d.tolist() for d in digits])) ==
+           [(0, 0), (0, 1), (0, 2), (1, 2), (1, 1), (1, 0), (2, 0), (2, 1), (2, 2)])
+    with pytest.raises(ValueError):
+        ordered_digits(numpy.arange(9), [3, 3], 'hilbert')
+
+    for sizes in [[2, 3, 2], [3, 3, 3]]:
+        total = int(numpy.prod(sizes))
+        digits = ordered_digits(numpy.arange(total), sizes, 'serpentine')
+        points = list(zip(*[d.tolist() for d in digits]))
+        assert(len(set(points)) == total)
+        assert(all(len(changes(p, q)) == 1 for p, q in zip(points, points[1:])))
+    assert(points[:7] == [(0, 0, 0), (0, 0, 1), (0, 0, 2), (0, 1, 2), (0, 1, 1),
+                          (0, 1, 0), (0, 2, 0)])
+
+
+@pytest.mark.parametrize('sizes', [[3, 3, 3], [2, 3, 4], [4, 2, 2, 3]])
+def test_gray_single_change(sizes):
+    total = int(numpy.prod(sizes))
+    points = list(zip(*[d.tolist() for d in ordered_digits(numpy.arange(total), sizes, 'gray')]))
+
+    assert(len(set(points)) == total)
+    assert(all(len(changes(p, q)) == 1 for p, q in zip(points, points[1:])))
+
+
+@pytest.mark.parametrize('order', ['lexicographic', 'serpentine', 'gray'])
+def test_traverse_covers_scheme(order, named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'a': [1, 2, 3]}, {'b': [10, 20], 'l': 'xy'},
+                           {'d': [100, 200, 300]})
+    pairs = list(ischeme.traverse(order, with_index=True))
+
+    assert(sorted(index for index, _ in pairs) == list(range(len(ischeme))))
+    assert(all(ischeme[index] == point for index, point in pairs))
+    assert([index for index, _ in pairs] == ischeme.traversal_indices(order).tolist())
+
+
+def test_traverse_fewer_changes(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'a': [1, 2, 3]}, {'b': [10, 20], 'l': 'xy'},
+                           {'d': [100, 200, 300]})
+    counts = {}
+    for order in ['lexicographic', 'serpentine', 'gray']:
+        points = list(ischeme.traverse(order))
+        # b and l are zipped, so they make one level
+        levels = [(c, a, (b, l), d) for c, a, b, l, d in points]
+        counts[order] = sum(len(changes(p, q)) for p, q in zip(levels, levels[1:]))
+
+    assert(counts['gray'] == len(ischeme) - 1)
+    assert(counts['gray'] == counts['serpentine'] < counts['lexicographic'])
+    assert(list(ischeme.traverse('gray'))[:4] ==
+           [(0.5, 1, 10, 'x', 100), (0.5, 1, 10, 'x', 200),
+            (0.5, 1, 10, 'x', 300), (0.5, 1, 20, 'y', 300)])
+
+
+def test_traverse_store_canonical(named_scheme):
+    ischeme = named_scheme({'c': 0.5}, {'a': [1, 2, 3]}, {'b': [10, 20], 'l': 'xy'},
+                           {'d': [100, 200, 300]})
+    grid = ResultGrid(ischeme)
+    for index, point in ischeme.traverse('serpentine', adapter=dict_adapter,
+                                         with_index=True):
+        grid[index] = point['a'] + point['d']
+
+    assert(grid.data.ravel().tolist() == [a + d for _, a, _, _, d in ischeme])
+
+
+@pytest.mark.parametrize('order', ['serpentine', 'gray'])
+def test_traverse_constrained_and_lazy(order, named_scheme):
+    constrained = named_scheme({'c': 0.5}, {'a': [1, 2, 3]}, {'b': [10, 20], 'l': 'xy'},
+                               {'d': [100, 200, 300]}).where(lambda a, d: a * 100 != d)
+    pairs = list(constrained.traverse(order, with_index=True))
+    assert(sorted(i for i, _ in pairs) == list(range(len(constrained))))
+    assert(all(constrained[i] == point for i, point in pairs))
+
+    lazy = IS(NoConstants() >> ISE([1, 2]) >> ISE(Arithmetic(0.0, 0.5, 3)))
+    assert(list(lazy.traverse(order)) ==
+           [(1, 0.0), (1, 0.5), (1, 1.0), (2, 1.0), (2, 0.5), (2, 0.0)])